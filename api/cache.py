@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Run id before the first pipeline run has been observed
+_UNSET = object()
+
+
+class LRUStore:
+    """
+    Thread-safe in-memory LRU store, bounded by entry count and total body bytes.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old["body"])
+
+            self._entries[key] = entry
+            self._bytes += len(entry["body"])
+
+            # Evict least recently used entries until both bounds hold
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted["body"])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class DiskStore:
+    """
+    Optional on-disk backend: one JSON file per entry, so cached responses survive restarts
+    and can be shared by several API workers on one host.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry["body"] = entry["body"].encode()
+        return entry
+
+    def set(self, key, entry):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**entry, "body": entry["body"].decode()}, f)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON responses keyed by endpoint and parameters, tagged with the
+    pipeline run that produced the underlying marts. Seeing a new run_id drops every entry.
+    Entries also expire after `ttl` seconds as a safety net for marts rebuilt outside the pipeline.
+    """
+
+    def __init__(self, ttl, max_entries=512, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.ttl = ttl
+        self.memory = LRUStore(max_entries, max_bytes)
+        self.disk = DiskStore(disk_dir) if disk_dir else None
+        self.run_id = _UNSET
+
+    def observe_run(self, run_id):
+        """
+        Invalidates the whole cache when the pipeline run changes.
+        On startup the current run is adopted as-is, so disk entries from it stay valid.
+        """
+        if self.run_id is _UNSET:
+            self.run_id = run_id
+        elif run_id != self.run_id:
+            logger.info(f"Pipeline run changed to {run_id}: invalidating response cache")
+            self.clear()
+            self.run_id = run_id
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk:
+            self.disk.clear()
+
+    def _valid(self, entry):
+        return (
+            entry is not None
+            and entry["run_id"] == self.run_id
+            and entry["expires_at"] > time.time()
+        )
+
+    def get(self, key):
+        entry = self.memory.get(key)
+        if self._valid(entry):
+            return entry
+
+        if self.disk:
+            entry = self.disk.get(key)
+            if self._valid(entry):
+                self.memory.set(key, entry)
+                return entry
+        return None
+
+    def set(self, key, body, last_modified):
+        entry = {
+            "body": body,
+            "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+            "last_modified": last_modified.timestamp(),
+            "run_id": self.run_id,
+            "expires_at": time.time() + self.ttl,
+        }
+        self.memory.set(key, entry)
+        if self.disk:
+            self.disk.set(key, entry)
+        return entry
+
+
+class PipelineRunTracker:
+    """
+    Remembers the latest completed pipeline run, re-reading it at most every `refresh_seconds`.
+    """
+
+    def __init__(self, query, refresh_seconds=30):
+        self.query = text(query)
+        self.refresh_seconds = refresh_seconds
+        self.run_id = None
+        self.completed_at = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, db):
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+            try:
+                row = (await db.execute(self.query)).first()
+            except Exception as e:
+                # No run recorded yet (table missing): fall back to TTL-only caching
+                logger.warning(f"Could not read pipeline run: {e}")
+                await db.rollback()
+                row = None
+            self.run_id, self.completed_at = row if row else (None, None)
+            self._checked_at = time.monotonic()
+
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or entry["etag"] in tags or f"W/{entry['etag']}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(entry["last_modified"]) <= since
+    return False
+
+
+async def cached_json_response(request, db, cache, tracker, key, compute):
+    """
+    Serves `compute()` through the response cache, with ETag/Last-Modified validators.
+    Returns 304 when the client's copy is current.
+    """
+    await tracker.refresh(db)
+    cache.observe_run(tracker.run_id)
+
+    entry = cache.get(key)
+    if entry is None:
+        value = await compute()
+        body = json.dumps(jsonable_encoder(value)).encode()
+        last_modified = tracker.completed_at or datetime.now(timezone.utc)
+        entry = cache.set(key, body, last_modified)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": format_datetime(
+            datetime.fromtimestamp(entry["last_modified"], timezone.utc), usegmt=True
+        ),
+        # Clients may store the response but must revalidate (cheap 304) before reuse
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
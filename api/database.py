@@ -0,0 +1,58 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from src.config import settings
+
+# Created by init_engine() at startup (or on first use), not at import
+engine = None
+SessionLocal = None
+
+
+def init_engine():
+    """
+    Creates the async engine (asyncpg) and session factory once and returns the factory.
+    Pool size/overflow bound concurrent connections per API process; prepared statements
+    are cached per connection by the asyncpg dialect.
+    """
+    global engine, SessionLocal
+    if SessionLocal is not None:
+        return SessionLocal
+
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    engine = create_async_engine(
+        f"{settings.ASYNC_DB_CONNECTION_STR}"
+        f"?prepared_statement_cache_size={settings.API_DB_PREPARED_STATEMENT_CACHE}",
+        pool_size=settings.API_DB_POOL_SIZE,
+        max_overflow=settings.API_DB_MAX_OVERFLOW,
+        pool_timeout=settings.API_DB_POOL_TIMEOUT,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        connect_args={
+            "server_settings": {
+                # Runaway queries are cancelled server-side instead of pinning a connection
+                "statement_timeout": str(settings.API_DB_STATEMENT_TIMEOUT_MS),
+                "application_name": "telehealth-api",
+            }
+        },
+    )
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    return SessionLocal
+
+
+async def dispose_engine():
+    """
+    Closes pooled connections; the next init_engine() creates a fresh engine.
+    """
+    global engine, SessionLocal
+    if engine is not None:
+        await engine.dispose()
+    engine = SessionLocal = None
+
+
+# Dependency
+async def get_db():
+    session_factory = init_engine()
+    async with session_factory() as db:
+        yield db
@@ -0,0 +1,185 @@
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import text
+
+# Exportable marts: table and (column, Arrow type) layout.
+# Rows are ordered by the keyset (coalesce(date_key, 0), message_id, channel_name):
+# message_ids are only unique within a channel, and rows without a date sort first.
+EXPORTS = {
+    "messages": {
+        "table": "dbt_postgres.fct_messages",
+        "columns": [
+            ("message_id", "int64"),
+            ("channel_name", "string"),
+            ("channel_key", "string"),
+            ("date_key", "int32"),
+            ("view_count", "int32"),
+            ("forward_count", "int32"),
+            ("message_length", "int32"),
+            ("has_image", "bool"),
+            ("has_media", "bool"),
+            ("loaded_at", "timestamp"),
+        ],
+    },
+    "image-detections": {
+        "table": "dbt_postgres.fct_image_detections",
+        "columns": [
+            ("message_id", "int64"),
+            ("channel_name", "string"),
+            ("channel_key", "string"),
+            ("date_key", "int32"),
+            ("detected_class", "string"),
+            ("confidence_score", "float64"),
+            ("image_category", "string"),
+            ("detected_at", "timestamp"),
+        ],
+    },
+}
+
+SORT_KEY = "coalesce(date_key, 0)"
+
+# Keyset position before the first row
+START_KEY = (-1, 0, "")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def page_query(export, bounded):
+    """
+    One keyset page: rows strictly after (:date_key, :message_id, :channel_name),
+    optionally within [:from_date_key, :to_date_key]. No OFFSET, so every page is an
+    index range scan however deep into the table it starts.
+    """
+    columns = ", ".join(name for name, _ in export["columns"])
+    date_filter = (
+        f"AND {SORT_KEY} BETWEEN :from_date_key AND :to_date_key" if bounded else ""
+    )
+    return text(f"""
+        SELECT {columns}
+        FROM {export['table']}
+        WHERE ({SORT_KEY}, message_id, channel_name) > (:date_key, :message_id, :channel_name)
+        {date_filter}
+        ORDER BY {SORT_KEY}, message_id, channel_name
+        LIMIT :page_rows
+    """)
+
+
+async def iter_export_rows(
+    session_factory, export, after=START_KEY, limit=None, from_date_key=None,
+    to_date_key=None, page_rows=10000, fetch_rows=1000,
+):
+    """
+    Yields lists of row mappings, at most fetch_rows at a time, until the table (or limit)
+    is exhausted. Each page of page_rows is read through a server-side cursor in its own
+    short transaction, so memory stays bounded and no snapshot is held for the whole export.
+    """
+    bounded = from_date_key is not None or to_date_key is not None
+    query = page_query(export, bounded)
+    date_key, message_id, channel_name = after
+    remaining = limit
+
+    async with session_factory() as session:
+        while remaining is None or remaining > 0:
+            size = page_rows if remaining is None else min(page_rows, remaining)
+            params = {
+                "date_key": date_key,
+                "message_id": message_id,
+                "channel_name": channel_name,
+                "page_rows": size,
+            }
+            if bounded:
+                params["from_date_key"] = from_date_key if from_date_key is not None else 0
+                params["to_date_key"] = to_date_key if to_date_key is not None else 99991231
+
+            fetched = 0
+            last = None
+            result = await session.stream(query, params)
+            async for partition in result.mappings().partitions(fetch_rows):
+                fetched += len(partition)
+                last = partition[-1]
+                yield partition
+            await session.commit()
+
+            if fetched < size:
+                return
+            date_key, message_id, channel_name = (
+                last["date_key"] or 0,
+                last["message_id"],
+                last["channel_name"],
+            )
+            if remaining is not None:
+                remaining -= fetched
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+async def encode_ndjson(partitions):
+    """
+    One JSON object per line; each fetched partition becomes one chunk of the response.
+    """
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(row), default=_json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+
+
+def arrow_schema(export):
+    """
+    Returns the pyarrow schema of an export (pyarrow is only imported for Arrow exports).
+    """
+    import pyarrow as pa
+
+    types = {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in export["columns"]])
+
+
+async def encode_arrow(partitions, schema):
+    """
+    Arrow IPC stream: the schema first, then one record batch per fetched partition.
+    """
+    import pyarrow as pa
+
+    buffer = io.BytesIO()
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer = pa.ipc.new_stream(buffer, schema)
+    yield drain()
+
+    async for rows in partitions:
+        batch = pa.RecordBatch.from_arrays(
+            [
+                pa.array([row[field.name] for row in rows], type=field.type)
+                for field in schema
+            ],
+            schema=schema,
+        )
+        writer.write_batch(batch)
+        yield drain()
+
+    writer.close()
+    yield drain()
@@ -1,9 +1,10 @@
-from fastapi import FastAPI, HTTPException, Depends
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
-from collections import Counter
-import re
-from typing import List
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 from .schemas import (
     HealthCheck,
     TopProduct,
@@ -11,6 +12,18 @@ from .schemas import (
     VisualContentStats,
     VisualContentResponse,
     SearchResult,
+    ImageClassification,
+)
+from .cache import ResponseCache, PipelineRunTracker, cached_json_response
+from .database import init_engine, dispose_engine, get_db
+from .export import (
+    EXPORTS,
+    MEDIA_TYPES,
+    START_KEY,
+    iter_export_rows,
+    arrow_schema,
+    encode_arrow,
+    encode_ndjson,
 )
 
 import sys
@@ -18,142 +31,215 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 from src.config import settings
+from src.orchestration.run_registry import CURRENT_RUN_QUERY
+from src.instrumentation import REGISTRY, histogram
 
-# Database Setup
-engine = create_engine(settings.DB_CONNECTION_STR)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-app = FastAPI(title="TeleHealth Analytics API")
+# Client for the YOLO model server (/api/classify), created on first use
+model_server = None
 
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def get_model_server():
+    global model_server
+    if model_server is None:
+        from src.enrichment import model_client
+
+        model_server = model_client.connect_async()
+    return model_server
+
+
+@asynccontextmanager
+async def lifespan(app):
+    init_engine()
+    yield
+    # Close pooled connections on shutdown
+    await dispose_engine()
+    if model_server is not None:
+        await model_server.aclose()
+
+
+app = FastAPI(title="TeleHealth Analytics API", lifespan=lifespan)
+
+# The marts only change when the pipeline rebuilds them, so responses are cached
+# per pipeline run and all entries are dropped when transform_data records a new run.
+response_cache = ResponseCache(
+    ttl=settings.API_CACHE_TTL_SECONDS,
+    max_entries=settings.API_CACHE_MAX_ENTRIES,
+    max_bytes=settings.API_CACHE_MAX_BYTES,
+    disk_dir=settings.API_CACHE_DIR or None,
+)
+run_tracker = PipelineRunTracker(
+    CURRENT_RUN_QUERY, refresh_seconds=settings.API_RUN_REFRESH_SECONDS
+)
+
+REQUEST_SECONDS = histogram(
+    "api_request_seconds", "API request latency", ["method", "route", "status"]
+)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Route template (e.g. /api/channels/{channel_name}/activity) keeps label cardinality bounded
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=route.path if route else "unmatched",
+        status=response.status_code,
+    )
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Process metrics in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 @app.get("/health", response_model=HealthCheck)
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
 
 @app.get("/api/reports/top-products", response_model=List[TopProduct])
-def get_top_products(db: Session = Depends(get_db)):
+async def get_top_products(
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Returns most frequent text tokens from messages, simulating 'product' extraction.
-    Logic: Fetches message text from fct_messages, tokenizes, and counts.
+    Logic: Reads the top N from the mart_token_counts dbt model, which counts tokens
+    across all messages once per pipeline run.
     """
-    try:
-        # Fetching texts from fct_messages via raw.telegram_messages or stg/fct table
-        # Since dbt models might be in a different schema (dbt_postgres), let's query the marts or public view if it exists.
-        # Assuming dbt runs into 'dbt_postgres' schema or similar as per default profiles.yml
-        # In this setup, we'll try to query likely table locations.
-
-        # NOTE: Using raw table for text access if marts don't preserve full text or for simplicity
-        query = text(
-            "SELECT message_text FROM raw.telegram_messages WHERE message_text IS NOT NULL LIMIT 1000"
-        )
-        result = db.execute(query).fetchall()
 
-        all_text = " ".join([row[0] for row in result])
-        # Simple tokenization
-        tokens = re.findall(r"\w+", all_text.lower())
-        # Filter small words
-        tokens = [t for t in tokens if len(t) > 3]
-
-        counts = Counter(tokens)
-        top_10 = counts.most_common(10)
+    async def compute():
+        query = text("""
+            SELECT token, token_count
+            FROM dbt_postgres.mart_token_counts
+            ORDER BY token_count DESC, token
+            LIMIT :limit
+        """)
+        result = (await db.execute(query, {"limit": limit})).fetchall()
+        return [{"token": row[0], "count": row[1]} for row in result]
 
-        return [{"token": t, "count": c} for t, c in top_10]
+    try:
+        return await cached_json_response(
+            request, db, response_cache, run_tracker, f"top-products?limit={limit}", compute
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/channels/{channel_name}/activity", response_model=List[ChannelActivity])
-def get_channel_activity(channel_name: str, db: Session = Depends(get_db)):
+async def get_channel_activity(
+    request: Request, channel_name: str, db: AsyncSession = Depends(get_db)
+):
     """
-    Returns daily post counts for a specific channel.
+    Returns daily post counts (with view/forward sums and media share) for a specific channel.
     """
-    try:
-        # Sanitize input slightly or rely on param binding.
-        # Querying fct_messages and dim_dates (or just grouping by date key)
-        # We need to map channel_name to channel_key or just filter by raw table if simpler
-        # But rubric asks for dim_channels + fct_messages usage.
-
-        # Warning: Schema might be 'dbt_postgres' or 'public' depend on dbt profile settings.
-        # Set to 'dbt_postgres' based on previous tasks.
 
+    async def compute():
+        # One pre-aggregated row per channel per day (agg_channel_daily dbt model)
         query = text("""
-            SELECT 
-                d.date_day,
-                COUNT(f.message_id) as post_count
-            FROM dbt_postgres.fct_messages f
-            JOIN dbt_postgres.dim_channels c ON f.channel_key = c.channel_key
-            JOIN dbt_postgres.dim_dates d ON f.date_key = d.date_key
-            WHERE c.channel_name = :channel_name
-            GROUP BY d.date_day
-            ORDER BY d.date_day DESC
+            SELECT date_day, post_count, view_sum, forward_sum, media_share
+            FROM dbt_postgres.agg_channel_daily
+            WHERE channel_name = :channel_name
+            ORDER BY date_day DESC
         """)
 
-        result = db.execute(query, {"channel_name": channel_name}).fetchall()
+        result = (
+            await db.execute(query, {"channel_name": channel_name})
+        ).fetchall()
 
         return [
-            {"date": row[0], "post_count": row[1], "channel_name": channel_name}
+            {
+                "date": row[0],
+                "post_count": row[1],
+                "channel_name": channel_name,
+                "view_sum": row[2],
+                "forward_sum": row[3],
+                "media_share": row[4],
+            }
             for row in result
         ]
+
+    try:
+        return await cached_json_response(
+            request,
+            db,
+            response_cache,
+            run_tracker,
+            f"channel-activity?channel_name={channel_name}",
+            compute,
+        )
     except Exception as e:
-        # Fallback to looking in raw if dbt tables not ready or empty for this specific channel
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
 @app.get("/api/reports/visual-content", response_model=VisualContentResponse)
-def get_visual_content_stats(db: Session = Depends(get_db)):
+async def get_visual_content_stats(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Returns count of promotional vs product_display images.
     """
-    try:
+
+    async def compute():
         query = text("""
             SELECT image_category, COUNT(*) as count
             FROM dbt_postgres.fct_image_detections
             GROUP BY image_category
         """)
 
-        result = db.execute(query).fetchall()
+        result = (await db.execute(query)).fetchall()
         stats = [{"image_category": row[0], "count": row[1]} for row in result]
         return {"stats": stats}
 
+    try:
+        return await cached_json_response(
+            request, db, response_cache, run_tracker, "visual-content", compute
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 
 @app.get("/api/search/messages", response_model=List[SearchResult])
-def search_messages(keyword: str, db: Session = Depends(get_db)):
+async def search_messages(
+    keyword: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0, le=10000),
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Search messages by keyword (ILIKE).
+    Full-text search over message text (GIN-indexed tsvector maintained by the loader).
+    Accepts multiple terms, "quoted phrases", OR and -exclusions (websearch syntax).
+    Results are ranked by relevance, then recency, and paginated with limit/offset.
     """
     try:
-        # Searching raw messages or fct_messages.
-        # Using fct_messages linked to dim_channels might be better but raw has text more reliably?
-        # fct_messages usually has keys. Let's assume raw text is in raw table or stg.
-        # Logic: Select from raw.telegram_messages
-
         query = text("""
-            SELECT 
-                r.message_id, 
-                r.channel_name, 
+            SELECT
+                r.message_id,
+                r.channel_name,
                 r.message_date::date as date,
-                r.message_text
-            FROM raw.telegram_messages r
-            WHERE r.message_text ILIKE :keyword
-            ORDER BY r.message_date DESC
-            LIMIT 50
+                r.message_text,
+                ts_rank_cd(r.message_tsv, q) as rank
+            FROM raw.telegram_messages r,
+                 websearch_to_tsquery('simple', :keyword) q
+            WHERE r.message_tsv @@ q
+            ORDER BY rank DESC, r.message_date DESC
+            LIMIT :limit OFFSET :offset
         """)
 
-        search_pattern = f"%{keyword}%"
-        result = db.execute(query, {"keyword": search_pattern}).fetchall()
+        result = (
+            await db.execute(
+                query, {"keyword": keyword, "limit": limit, "offset": offset}
+            )
+        ).fetchall()
 
         return [
             {
@@ -161,8 +247,146 @@ def search_messages(keyword: str, db: Session = Depends(get_db)):
                 "channel_name": row[1],
                 "date": row[2],
                 "message_text": row[3],
+                "rank": row[4],
             }
             for row in result
         ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+
+async def stream_export(
+    name, format, limit, after_date_key, after_message_id, after_channel_name,
+    from_date_key, to_date_key,
+):
+    resume = (after_date_key, after_message_id, after_channel_name)
+    if any(value is not None for value in resume) and None in resume:
+        raise HTTPException(
+            status_code=400,
+            detail="after_date_key, after_message_id and after_channel_name go together",
+        )
+    export = EXPORTS[name]
+    schema = arrow_schema(export) if format == "arrow" else None
+
+    rows = iter_export_rows(
+        init_engine(),
+        export,
+        after=START_KEY if after_date_key is None else resume,
+        limit=limit,
+        from_date_key=from_date_key,
+        to_date_key=to_date_key,
+        page_rows=settings.API_EXPORT_PAGE_ROWS,
+        fetch_rows=settings.API_EXPORT_FETCH_ROWS,
+    )
+    # Fetch the first rows before answering, so a failing query is still a 500
+    # instead of a truncated 200 stream
+    try:
+        first = await rows.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        await rows.aclose()
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+    async def partitions():
+        try:
+            if first is not None:
+                yield first
+                async for partition in rows:
+                    yield partition
+        finally:
+            await rows.aclose()
+
+    body = (
+        encode_arrow(partitions(), schema)
+        if format == "arrow"
+        else encode_ndjson(partitions())
+    )
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'},
+    )
+
+
+# Bulk exports for analytics consumers. The database session is opened inside the stream
+# (not via get_db), because dependency cleanup runs before a streaming body is sent.
+@app.get("/api/export/messages")
+async def export_messages(
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    limit: Optional[int] = Query(None, ge=1),
+    after_date_key: Optional[int] = Query(None, ge=0),
+    after_message_id: Optional[int] = None,
+    after_channel_name: Optional[str] = None,
+    from_date_key: Optional[int] = Query(None, ge=0, le=99991231),
+    to_date_key: Optional[int] = Query(None, ge=0, le=99991231),
+):
+    """
+    Streams fct_messages as NDJSON or an Arrow IPC stream, ordered by
+    (date_key, message_id, channel_name) with undated rows first (date_key 0 in the key).
+    To resume an interrupted export, pass the last received row's key as
+    after_date_key/after_message_id/after_channel_name; from/to_date_key bound the range.
+    """
+    return await stream_export(
+        "messages", format, limit, after_date_key, after_message_id,
+        after_channel_name, from_date_key, to_date_key,
+    )
+
+
+@app.get("/api/export/image-detections")
+async def export_image_detections(
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    limit: Optional[int] = Query(None, ge=1),
+    after_date_key: Optional[int] = Query(None, ge=0),
+    after_message_id: Optional[int] = None,
+    after_channel_name: Optional[str] = None,
+    from_date_key: Optional[int] = Query(None, ge=0, le=99991231),
+    to_date_key: Optional[int] = Query(None, ge=0, le=99991231),
+):
+    """
+    Streams fct_image_detections as NDJSON or an Arrow IPC stream; ordering, resuming
+    and date bounds work as for /api/export/messages.
+    """
+    return await stream_export(
+        "image-detections", format, limit, after_date_key, after_message_id,
+        after_channel_name, from_date_key, to_date_key,
+    )
+
+
+@app.post("/api/classify", response_model=ImageClassification)
+async def classify_image(request: Request):
+    """
+    Classifies an image sent as the raw request body (e.g. `--data-binary @photo.jpg`)
+    with the YOLO model server, using the enrichment pipeline's category rules.
+    """
+    if not settings.YOLO_SERVER_URL:
+        raise HTTPException(status_code=503, detail="YOLO_SERVER_URL is not configured")
+
+    # Stream the body so oversized uploads are rejected without buffering them
+    data = bytearray()
+    async for chunk in request.stream():
+        data.extend(chunk)
+        if len(data) > settings.API_CLASSIFY_MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Image exceeds {settings.API_CLASSIFY_MAX_BYTES} bytes",
+            )
+    if not data:
+        raise HTTPException(status_code=400, detail="Request body must contain an image")
+
+    import httpx
+
+    try:
+        response = await get_model_server().post(
+            "/classify",
+            content=bytes(data),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+    except httpx.TransportError as e:
+        raise HTTPException(status_code=503, detail=f"Model server unavailable: {str(e)}")
+
+    if response.status_code in (400, 422, 503):
+        raise HTTPException(status_code=response.status_code, detail=response.json()["detail"])
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Model server error: {response.text}")
+    return response.json()
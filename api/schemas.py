@@ -16,6 +16,9 @@ class ChannelActivity(BaseModel):
     date: date
     post_count: int
     channel_name: str
+    view_sum: Optional[int] = None
+    forward_sum: Optional[int] = None
+    media_share: Optional[float] = None
 
 
 class VisualContentStats(BaseModel):
@@ -32,3 +35,12 @@ class SearchResult(BaseModel):
     channel_name: str
     date: date
     message_text: str
+    rank: Optional[float] = None
+
+
+class ImageClassification(BaseModel):
+    detected_class: str
+    confidence: float
+    image_category: str
+    all_classes: str
+    model_version: str
@@ -0,0 +1,140 @@
+"""
+Concurrent load test for the analytics API.
+
+Fires requests at a set of endpoints from `--concurrency` workers for `--duration` seconds and
+reports requests/sec, latency percentiles and errors per endpoint. Run it once against the
+server before a change and once after (same flags, different `--label`) and compare the JSON.
+
+Usage: python benchmarks/api_load.py --base-url http://localhost:8000 --concurrency 64 --label after
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+import logging
+import itertools
+
+import httpx
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINTS = [
+    "/health",
+    "/api/reports/top-products",
+    "/api/channels/tikvahpharma/activity",
+    "/api/reports/visual-content",
+    "/api/search/messages?keyword=paracetamol",
+]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def worker(client, endpoints, deadline, results):
+    """
+    Cycles through the endpoints until the deadline, recording latency and status per call.
+    """
+    for endpoint in itertools.cycle(endpoints):
+        if time.perf_counter() >= deadline:
+            return
+        stats = results[endpoint]
+        start = time.perf_counter()
+        try:
+            response = await client.get(endpoint)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        stats["latencies"].append((time.perf_counter() - start) * 1000)
+        if not ok:
+            stats["errors"] += 1
+
+
+async def run(base_url, endpoints, concurrency, duration):
+    results = {endpoint: {"latencies": [], "errors": 0} for endpoint in endpoints}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # Warm-up: one call per endpoint so connection setup is not measured
+        for endpoint in endpoints:
+            try:
+                await client.get(endpoint)
+            except httpx.HTTPError as e:
+                logger.warning(f"Warm-up failed for {endpoint}: {e}")
+
+        start = time.perf_counter()
+        deadline = start + duration
+        # Stagger start points so every endpoint sees concurrent load
+        rotations = [
+            endpoints[i % len(endpoints):] + endpoints[: i % len(endpoints)]
+            for i in range(concurrency)
+        ]
+        await asyncio.gather(
+            *(worker(client, rotation, deadline, results) for rotation in rotations)
+        )
+        elapsed = time.perf_counter() - start
+
+    summary = {}
+    total_requests = 0
+    for endpoint, stats in results.items():
+        latencies = stats["latencies"]
+        total_requests += len(latencies)
+        summary[endpoint] = {
+            "requests": len(latencies),
+            "errors": stats["errors"],
+            "requests_per_sec": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+
+    return {
+        "total_requests": total_requests,
+        "requests_per_sec": round(total_requests / elapsed, 1),
+        "elapsed_seconds": round(elapsed, 2),
+        "endpoints": summary,
+    }
+
+
+def main(base_url, endpoints, concurrency, duration, label, output):
+    logger.info(
+        f"Load testing {base_url} with {concurrency} concurrent clients for {duration}s..."
+    )
+    report = asyncio.run(run(base_url, endpoints, concurrency, duration))
+    report.update({"label": label, "base_url": base_url, "concurrency": concurrency})
+
+    logger.info(f"[{label}] {report['requests_per_sec']} requests/sec overall")
+    for endpoint, stats in report["endpoints"].items():
+        logger.info(f"[{label}] {endpoint}: {stats}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", action="append", dest="endpoints")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    main(
+        args.base_url,
+        args.endpoints or DEFAULT_ENDPOINTS,
+        args.concurrency,
+        args.duration,
+        args.label,
+        args.output or f"benchmarks/results/api_load_{args.label}.json",
+    )
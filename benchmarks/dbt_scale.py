@@ -0,0 +1,159 @@
+"""
+Times the dbt build of fct_image_detections at a multiple of the current data volume.
+
+Copies raw.telegram_messages and raw.image_detections `--factor` times (10x by default) into a
+`bench_raw` schema, shifting message_ids so keys stay unique per channel, and builds the models
+into a separate `dbt_bench` schema. Reports a full build and an incremental build after
+re-enriching 1% of the images, using the per-model timings from dbt's run_results.json.
+
+Usage: python benchmarks/dbt_scale.py --factor 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import subprocess
+
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from src.config import settings
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = "dbt_project"
+BENCH_RAW_SCHEMA = "bench_raw"
+BENCH_TARGET_SCHEMA = "dbt_bench"
+MODEL = "fct_image_detections"
+
+MESSAGE_COLUMNS = [
+    "channel_name", "channel_title", "message_date", "message_text", "has_media",
+    "image_path", "views", "forwards", "loaded_at",
+]
+DETECTION_COLUMNS = [
+    "channel_name", "detected_class", "confidence", "image_category", "all_classes",
+    "image_path", "content_hash", "model_version", "detected_at",
+]
+
+
+def clone_scaled(connection, factor):
+    """
+    Fills bench_raw with `factor` copies of the raw tables (same indexes), returning row counts.
+    """
+    offset = connection.execute(
+        text("SELECT coalesce(max(message_id), 0) + 1 FROM raw.telegram_messages")
+    ).scalar()
+
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_RAW_SCHEMA} CASCADE;"))
+    connection.execute(text(f"CREATE SCHEMA {BENCH_RAW_SCHEMA};"))
+
+    counts = {}
+    for table, columns in [
+        ("telegram_messages", MESSAGE_COLUMNS),
+        ("image_detections", DETECTION_COLUMNS),
+    ]:
+        column_list = ", ".join(columns)
+        connection.execute(
+            text(
+                f"CREATE TABLE {BENCH_RAW_SCHEMA}.{table} (LIKE raw.{table} INCLUDING ALL);"
+            )
+        )
+        connection.execute(
+            text(f"""
+                INSERT INTO {BENCH_RAW_SCHEMA}.{table} (message_id, {column_list})
+                SELECT t.message_id + g * :offset, {', '.join(f't.{c}' for c in columns)}
+                FROM raw.{table} t
+                CROSS JOIN generate_series(0, :factor - 1) g;
+            """),
+            {"offset": offset, "factor": factor},
+        )
+        connection.execute(text(f"ANALYZE {BENCH_RAW_SCHEMA}.{table};"))
+        counts[table] = connection.execute(
+            text(f"SELECT count(*) FROM {BENCH_RAW_SCHEMA}.{table}")
+        ).scalar()
+
+    return counts
+
+
+def run_dbt(args):
+    """
+    Runs dbt against the bench schemas; returns (wall seconds, model execution seconds).
+    """
+    env = {**os.environ, "DBT_SCHEMA": BENCH_TARGET_SCHEMA}
+    command = [
+        "dbt", *args,
+        "--project-dir", PROJECT_DIR,
+        "--profiles-dir", PROJECT_DIR,
+        "--vars", json.dumps({"raw_schema": BENCH_RAW_SCHEMA}),
+    ]
+
+    start = time.perf_counter()
+    subprocess.run(command, check=True, env=env)
+    wall = time.perf_counter() - start
+
+    with open(os.path.join(PROJECT_DIR, "target", "run_results.json"), encoding="utf-8") as f:
+        run_results = json.load(f)
+    model_seconds = next(
+        (
+            result["execution_time"]
+            for result in run_results["results"]
+            if result["unique_id"].endswith(f".{MODEL}")
+        ),
+        None,
+    )
+    return wall, model_seconds
+
+
+def main(factor, output):
+    engine = create_engine(settings.DB_CONNECTION_STR)
+
+    logger.info(f"Cloning raw data x{factor} into {BENCH_RAW_SCHEMA}...")
+    with engine.begin() as connection:
+        counts = clone_scaled(connection, factor)
+    logger.info(f"Bench row counts: {counts}")
+
+    # Upstream models first, so the timed runs measure only the detections model
+    run_dbt(["run", "--select", f"+{MODEL}", "--exclude", MODEL, "--full-refresh"])
+
+    full_wall, full_model = run_dbt(["run", "--select", MODEL, "--full-refresh"])
+    logger.info(f"Full build: {full_model}s in model ({full_wall:.1f}s wall)")
+
+    # Simulate a nightly enrichment touching 1% of images
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"""
+                UPDATE {BENCH_RAW_SCHEMA}.image_detections SET detected_at = now()
+                WHERE message_id % 100 = 0
+            """)
+        )
+    incr_wall, incr_model = run_dbt(["run", "--select", MODEL])
+    logger.info(f"Incremental build: {incr_model}s in model ({incr_wall:.1f}s wall)")
+
+    results = {
+        "factor": factor,
+        "row_counts": counts,
+        "full_build": {"model_seconds": full_model, "wall_seconds": round(full_wall, 2)},
+        "incremental_build": {
+            "model_seconds": incr_model,
+            "wall_seconds": round(incr_wall, 2),
+        },
+    }
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--factor", type=int, default=10)
+    parser.add_argument("--output", default="benchmarks/results/dbt_scale.json")
+    args = parser.parse_args()
+
+    main(args.factor, args.output)
@@ -0,0 +1,232 @@
+"""
+Image decode time and memory: full-resolution decode vs the mmap + reduced-scale path.
+
+Writes `--images` synthetic JPEGs at `--width` x `--height` (Telegram photos are usually
+1280px on the long side), then decodes them to the model input size in three modes:
+  full         cv2.imread at full resolution, then resize (the previous path)
+  fast         mmap + JPEG reduced-scale decode, then resize
+  fast_pooled  fast, resizing into reused buffers from an image_io.BufferPool
+Each mode runs in a fresh process, holding `--batch-size` images at a time as an
+enrichment worker does. The report gives the decode time per image (mean/p50/p95), the
+pixels decoded per image and the peak RSS growth per held image, plus how far the
+dedup hashes of full and reduced decodes drift apart (Hamming bits). With `--detections`,
+the configured backend also runs on both decodes, and the category/class agreement
+between them is reported.
+
+Usage: python benchmarks/image_decode.py --images 200 --detections --label after
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import logging
+import resource
+import subprocess
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(REPO_ROOT)
+from src.config import settings
+from src.enrichment import image_io
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+MODES = ["full", "fast", "fast_pooled"]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def write_images(directory, count, width, height):
+    from benchmarks.synthetic import make_jpeg
+
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(42)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"{index}.jpg")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(make_jpeg(rng, width, height))
+        paths.append(path)
+    return paths
+
+
+def decoded_pixels(path, mode, imgsz):
+    with open(path, "rb") as f:
+        width, height = image_io.jpeg_size(f.read(64 * 1024))
+    factor = 1 if mode == "full" else image_io.reduction_factor(width, height, imgsz)
+    return -(-width // factor) * -(-height // factor)
+
+
+def run_mode(mode, paths, imgsz, batch_size):
+    """
+    Decodes every path in `mode`, batch_size images held at a time (runs in a child process).
+    """
+    import cv2  # noqa: F401  (imported before the RSS baseline)
+
+    buffers = image_io.BufferPool(batch_size, imgsz) if mode == "fast_pooled" else None
+
+    def decode(path):
+        if mode == "full":
+            return image_io.read_full(path, imgsz)
+        return image_io.read(path, imgsz, buffers)
+
+    # Warm up the decoder before taking the baseline, so it only measures held images
+    for image in [decode(path) for path in paths[:batch_size]]:
+        if buffers:
+            buffers.release(image)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    latencies = []
+    for start in range(0, len(paths), batch_size):
+        batch = []
+        for path in paths[start : start + batch_size]:
+            began = time.perf_counter()
+            batch.append(decode(path))
+            latencies.append((time.perf_counter() - began) * 1000)
+        if buffers:
+            for image in batch:
+                buffers.release(image)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "decoded_pixels_per_image": decoded_pixels(paths[0], mode, imgsz),
+        "peak_rss_growth_kb_per_held_image": round((peak_kb - baseline_kb) / batch_size, 1),
+    }
+
+
+def compare_hashes(paths):
+    """
+    Hamming distance between the dHash of a full and a reduced decode of each image.
+    """
+    from src.enrichment.dedup import dhash, hamming
+
+    distances = [hamming(dhash(path), dhash(path, reduced=True)) for path in paths]
+    return {
+        "mean_bits": round(sum(distances) / len(distances), 3),
+        "max_bits": max(distances),
+        "identical_share": round(distances.count(0) / len(distances), 4),
+    }
+
+
+def compare_detections(paths, imgsz, batch_size):
+    """
+    Runs the configured backend on full and fast decodes of the same images.
+    """
+    from src.enrichment import yolo_detect
+    from src.enrichment.yolo_detector import load_backend
+
+    model = load_backend(yolo_detect.BACKEND, yolo_detect.MODEL_PATH, imgsz)
+    detections = {}
+    for mode, decode in (
+        ("full", lambda path: image_io.read_full(path, imgsz)),
+        ("fast", lambda path: image_io.read(path, imgsz)),
+    ):
+        detections[mode] = []
+        for start in range(0, len(paths), batch_size):
+            images = [decode(path) for path in paths[start : start + batch_size]]
+            detections[mode].extend(yolo_detect.detect_batch(images, model))
+
+    pairs = list(zip(detections["full"], detections["fast"]))
+    return {
+        "backend": yolo_detect.BACKEND,
+        "images": len(pairs),
+        "category_agreement": round(
+            sum(a["image_category"] == b["image_category"] for a, b in pairs) / len(pairs), 4
+        ),
+        "class_agreement": round(
+            sum(a["detected_class"] == b["detected_class"] for a, b in pairs) / len(pairs), 4
+        ),
+        "mean_confidence_delta": round(
+            sum(abs(a["confidence"] - b["confidence"]) for a, b in pairs) / len(pairs), 4
+        ),
+    }
+
+
+def main(images, width, height, imgsz, batch_size, detections, workdir, label, output):
+    paths = write_images(os.path.join(workdir, f"decode_{width}x{height}"), images, width, height)
+    results = {
+        "label": label,
+        "images": len(paths),
+        "size": f"{width}x{height}",
+        "imgsz": imgsz,
+        "batch_size": batch_size,
+        "modes": {},
+    }
+
+    for mode in MODES:
+        logger.info(f"Decoding in {mode} mode...")
+        # A fresh process per mode keeps peak RSS comparable
+        result = subprocess.run(
+            [
+                sys.executable, os.path.abspath(__file__), "--worker", mode,
+                "--workdir", workdir, "--images", str(images), "--width", str(width),
+                "--height", str(height), "--imgsz", str(imgsz), "--batch-size", str(batch_size),
+            ],
+            capture_output=True, text=True, check=True,
+        )
+        results["modes"][mode] = json.loads(result.stdout.strip().splitlines()[-1])
+        logger.info(f"[{label}] {mode}: {results['modes'][mode]}")
+
+    full, fast = results["modes"]["full"]["mean_ms"], results["modes"]["fast"]["mean_ms"]
+    results["decode_speedup"] = round(full / fast, 2) if fast else None
+
+    results["dhash_drift"] = compare_hashes(paths)
+    logger.info(f"[{label}] dhash drift: {results['dhash_drift']}")
+
+    if detections:
+        logger.info("Comparing detections of full and fast decodes...")
+        results["detections"] = compare_detections(paths, imgsz, batch_size)
+        logger.info(f"[{label}] detections: {results['detections']}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=960)
+    parser.add_argument("--imgsz", type=int, default=settings.YOLO_IMAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=settings.YOLO_BATCH_SIZE)
+    parser.add_argument("--detections", action="store_true", help="Also compare detections.")
+    parser.add_argument("--workdir", default="benchmarks/work")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        paths = write_images(
+            os.path.join(args.workdir, f"decode_{args.width}x{args.height}"),
+            args.images, args.width, args.height,
+        )
+        print(json.dumps(run_mode(args.worker, paths, args.imgsz, args.batch_size)))
+    else:
+        main(
+            args.images,
+            args.width,
+            args.height,
+            args.imgsz,
+            args.batch_size,
+            args.detections,
+            os.path.abspath(args.workdir),
+            args.label,
+            args.output or f"benchmarks/results/image_decode_{args.label}.json",
+        )
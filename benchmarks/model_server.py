@@ -0,0 +1,142 @@
+"""
+Latency and throughput of the YOLO model server at different batch windows.
+
+Loads the model once, then for every `--window` (max_wait_ms) and `--concurrency` level
+starts the server app in-process and has that many clients POST synthetic JPEGs to
+/classify back to back for `--requests` images. Reports images/sec, request latency
+percentiles and the mean batch the model actually saw. A window of 0 only batches what is
+already queued; `--max-batch 1` gives the unbatched baseline.
+
+Usage: python benchmarks/model_server.py --window 0 --window 5 --window 20 --concurrency 1 --concurrency 16 --label after
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(REPO_ROOT)
+from src.config import settings
+from benchmarks.synthetic import make_jpeg
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+async def drive(app, images, concurrency, requests):
+    """
+    Runs `concurrency` closed-loop clients until `requests` images were classified.
+    Returns (latencies in ms, errors, elapsed seconds, mean model batch).
+    """
+    import httpx
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+
+            async def worker():
+                nonlocal errors
+                for index in remaining:
+                    start = time.perf_counter()
+                    response = await client.post(
+                        "/classify", content=images[index % len(images)]
+                    )
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    errors += response.status_code != 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            batcher = app.state.batcher
+            mean_batch = batcher.images / batcher.batches if batcher.batches else 0.0
+
+    return latencies, errors, elapsed, mean_batch
+
+
+def main(windows, concurrencies, requests, max_batch, image_count, label, output):
+    from src.enrichment import yolo_detect
+    from src.enrichment.model_server import create_app
+    from src.enrichment.yolo_detector import load_backend
+
+    rng = random.Random(42)
+    images = [make_jpeg(rng) for _ in range(image_count)]
+
+    start = time.perf_counter()
+    model = load_backend(yolo_detect.BACKEND, yolo_detect.MODEL_PATH, yolo_detect.IMAGE_SIZE)
+    results = {
+        "label": label,
+        "backend": yolo_detect.BACKEND,
+        "model_load_seconds": round(time.perf_counter() - start, 2),
+        "max_batch": max_batch,
+        "requests": requests,
+        "runs": [],
+    }
+
+    # One warm-up pass so the first window does not pay for lazy initialization
+    asyncio.run(drive(create_app(model, max_batch, 0), images, 1, min(requests, 8)))
+
+    for window in windows:
+        for concurrency in concurrencies:
+            app = create_app(model, max_batch, window)
+            latencies, errors, elapsed, mean_batch = asyncio.run(
+                drive(app, images, concurrency, requests)
+            )
+            run = {
+                "max_wait_ms": window,
+                "concurrency": concurrency,
+                "images_per_sec": round(requests / elapsed, 1) if elapsed else 0.0,
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "mean_batch": round(mean_batch, 2),
+                "errors": errors,
+            }
+            results["runs"].append(run)
+            logger.info(f"[{label}] {run}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--window", action="append", dest="windows", type=float)
+    parser.add_argument("--concurrency", action="append", dest="concurrencies", type=int)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--max-batch", type=int, default=settings.YOLO_SERVER_MAX_BATCH)
+    parser.add_argument("--images", type=int, default=64, help="Distinct synthetic JPEGs.")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    main(
+        args.windows or [0, 2, 5, 10, 20],
+        args.concurrencies or [1, 4, 16],
+        args.requests,
+        args.max_batch,
+        args.images,
+        args.label,
+        args.output or f"benchmarks/results/model_server_{args.label}.json",
+    )
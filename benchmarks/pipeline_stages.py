@@ -0,0 +1,405 @@
+"""
+Times every pipeline stage on synthetic data against a local Postgres, fully offline.
+
+Generates `--scale` messages (10k, 100k or 1m; or an exact count) and `--images` JPEGs in
+`--workdir`, then times:
+  scrape  the real scraper driven by a stub Telegram client
+  load    load_json_files / clean_data (parse and clean), then the COPY + merge into Postgres
+  enrich  yolo_detect.detect_and_classify per image (detections are stored for dbt and the API)
+  dbt     a full `dbt build`, with per-model execution times
+  api     each endpoint in-process (first request and warm p50/p95)
+
+Everything runs in a scratch database (`--database`, created if missing) so the real raw
+tables are never touched. Results are written as JSON (one file per scale and label) to track
+regressions across commits.
+
+Usage: python benchmarks/pipeline_stages.py --scale 100k --images 500 --label after
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import shutil
+import platform
+import functools
+import subprocess
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(REPO_ROOT)
+from src.config import settings
+from benchmarks.synthetic import (
+    SCALES, CHANNELS, StubTelegramClient, build_dataset, generate_messages
+)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+STAGES = ["scrape", "load", "enrich", "dbt", "api"]
+
+API_ENDPOINTS = [
+    "/health",
+    "/api/reports/top-products",
+    "/api/channels/tikvahpharma/activity",
+    "/api/reports/visual-content",
+    "/api/search/messages?keyword=paracetamol",
+]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def rate(count, seconds):
+    return round(count / seconds, 1) if seconds else 0.0
+
+
+def ensure_database(name):
+    """
+    Creates the scratch database if it does not exist yet.
+    """
+    from sqlalchemy import create_engine, text
+
+    admin_url = settings.DB_CONNECTION_STR.rsplit("/", 1)[0] + "/postgres"
+    engine = create_engine(admin_url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}
+        ).scalar()
+        if not exists:
+            logger.info(f"Creating scratch database {name}...")
+            connection.execute(text(f'CREATE DATABASE "{name}"'))
+    engine.dispose()
+
+
+def bench_scrape(messages):
+    """
+    Runs telegram_scraper.main() with the stub client in a scrape/ subdirectory.
+    """
+    scrape_dir = os.path.abspath("scrape")
+    os.makedirs(scrape_dir, exist_ok=True)
+    os.chdir(scrape_dir)
+    try:
+        from src.collectors import telegram_scraper
+
+        # The stub serves instantly; the limiter would otherwise dominate the timing
+        settings.SCRAPER_RATE = settings.SCRAPER_BURST = 1_000_000
+        telegram_scraper.API_ID, telegram_scraper.API_HASH = "0", "stub"
+        telegram_scraper.TelegramClient = functools.partial(
+            StubTelegramClient, messages_per_channel=messages // len(CHANNELS)
+        )
+
+        start = time.perf_counter()
+        stats = asyncio.run(telegram_scraper.main(channels=[f"@{c}" for c in CHANNELS]))
+        elapsed = time.perf_counter() - start
+    finally:
+        os.chdir("..")
+
+    return {
+        **stats,
+        "seconds": round(elapsed, 2),
+        "messages_per_sec": rate(stats["messages_scraped"], elapsed),
+    }
+
+
+# Valid message_date spellings that must all survive clean_data within one chunk
+MIXED_PRECISION_DATES = [
+    "2024-03-01T08:15:30+00:00",
+    "2024-03-01T08:15:30.123456+00:00",
+    "2024-03-01T08:15:30.5+03:00",
+    "2024-03-01T08:15:30Z",
+    "2024-03-01 08:15:30",
+    "2024-03-01",
+]
+
+
+def check_clean_data():
+    """
+    Raises if clean_data rejects any of MIXED_PRECISION_DATES, or any of the rows of a
+    generated chunk (synthetic messages are all valid).
+    """
+    import pandas as pd
+    from src.loaders import postgres_loader
+
+    chunk = list(generate_messages(postgres_loader.CHUNK_SIZE))
+    for index, date in enumerate(MIXED_PRECISION_DATES):
+        chunk[index] = {**chunk[index], "message_date": date}
+
+    df = postgres_loader.clean_data(pd.DataFrame(chunk))
+    if len(df) != len(chunk):
+        raise RuntimeError(f"clean_data rejected {len(chunk) - len(df)} valid rows")
+    if df["message_date"].isna().any():
+        raise RuntimeError("clean_data returned rows without a message_date")
+
+
+def bench_load(messages_dir):
+    """
+    Times parsing (load_json_files) and cleaning (clean_data) chunk by chunk as the loader does,
+    then a full-refresh load of the same files into the scratch database.
+    Synthetic messages are all valid, so any row clean_data rejects fails the stage.
+    """
+    import pandas as pd
+    from sqlalchemy import create_engine
+    from src.loaders import postgres_loader
+
+    check_clean_data()
+
+    rows = 0
+    rejected = 0
+    parse_seconds = clean_seconds = 0.0
+    chunks = postgres_loader.iter_chunks(
+        postgres_loader.load_json_files(messages_dir), postgres_loader.CHUNK_SIZE
+    )
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        parse_seconds += time.perf_counter() - start
+        if not chunk:
+            break
+
+        start = time.perf_counter()
+        df = postgres_loader.clean_data(pd.DataFrame(chunk))
+        clean_seconds += time.perf_counter() - start
+        rows += len(df)
+        rejected += len(chunk) - len(df)
+
+    if rejected:
+        raise RuntimeError(f"clean_data rejected {rejected} synthetic rows; see the quarantine file")
+
+    engine = create_engine(settings.DB_CONNECTION_STR)
+    start = time.perf_counter()
+    stats = postgres_loader.load_directory(messages_dir, engine, full_refresh=True)
+    db_seconds = time.perf_counter() - start
+    engine.dispose()
+
+    return {
+        "rows": rows,
+        "parse_seconds": round(parse_seconds, 2),
+        "parse_rows_per_sec": rate(rows, parse_seconds),
+        "clean_seconds": round(clean_seconds, 2),
+        "clean_rows_per_sec": rate(rows, clean_seconds),
+        "db_seconds": round(db_seconds, 2),
+        "db_rows_per_sec": rate(stats["rows_merged"], db_seconds),
+        **stats,
+    }
+
+
+def bench_enrich(image_dir):
+    """
+    Times model loading and detect_and_classify per image, then stores the detections.
+    """
+    from src.enrichment import yolo_detect
+    from src.enrichment.manifest import file_sha1
+    from src.enrichment.yolo_detector import load_backend
+
+    image_paths = sorted(yolo_detect.find_images(image_dir))
+
+    start = time.perf_counter()
+    model = load_backend(
+        yolo_detect.BACKEND, yolo_detect.MODEL_PATH, yolo_detect.IMAGE_SIZE
+    )
+    model_load_seconds = time.perf_counter() - start
+
+    latencies = []
+    records = []
+    start = time.perf_counter()
+    for image_path in image_paths:
+        image_start = time.perf_counter()
+        detection = yolo_detect.detect_and_classify(image_path, model)
+        latencies.append((time.perf_counter() - image_start) * 1000)
+        if detection:
+            channel_name, message_id = yolo_detect.parse_image_path(image_path)
+            records.append(
+                {
+                    "channel_name": channel_name,
+                    "message_id": message_id,
+                    "image_path": image_path,
+                    "content_hash": file_sha1(image_path),
+                    **detection,
+                }
+            )
+    elapsed = time.perf_counter() - start
+
+    if records:
+        yolo_detect.upsert_detections(records)
+
+    return {
+        "backend": yolo_detect.BACKEND,
+        "images": len(image_paths),
+        "detections": len(records),
+        "model_load_seconds": round(model_load_seconds, 2),
+        "seconds": round(elapsed, 2),
+        "images_per_sec": rate(len(image_paths), elapsed),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+    }
+
+
+def bench_dbt():
+    """
+    Times a full-refresh `dbt build` against the scratch database, with per-model timings.
+    """
+    from dbt.cli.main import dbtRunner
+
+    project_dir = os.path.join(REPO_ROOT, "dbt_project")
+    start = time.perf_counter()
+    result = dbtRunner().invoke(
+        ["build", "--full-refresh", "--project-dir", project_dir, "--profiles-dir", project_dir]
+    )
+    elapsed = time.perf_counter() - start
+    if not result.success:
+        raise RuntimeError(f"dbt build failed: {result.exception or 'see dbt logs'}")
+
+    return {
+        "seconds": round(elapsed, 2),
+        "nodes": {
+            node.node.name: round(node.execution_time, 3) for node in result.result
+        },
+    }
+
+
+async def time_endpoints(endpoints, repeats):
+    import httpx
+    from api.main import app, response_cache
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def timed(endpoint):
+            start = time.perf_counter()
+            response = await client.get(endpoint)
+            return (time.perf_counter() - start) * 1000, response.status_code >= 400
+
+        for endpoint in endpoints:
+            first, errors = await timed(endpoint)
+
+            # Uncached: the response cache is emptied before each request, so every one
+            # runs its query (on a warm connection pool)
+            uncached = []
+            for _ in range(repeats):
+                response_cache.clear()
+                latency, error = await timed(endpoint)
+                uncached.append(latency)
+                errors += error
+
+            # Cache hits for the report endpoints (the first request refills the cache)
+            cached = []
+            for _ in range(repeats):
+                latency, error = await timed(endpoint)
+                cached.append(latency)
+                errors += error
+
+            results[endpoint] = {
+                "first_ms": round(first, 2),
+                "uncached_p50_ms": round(percentile(uncached, 50), 2),
+                "uncached_p95_ms": round(percentile(uncached, 95), 2),
+                "cached_p50_ms": round(percentile(cached, 50), 2),
+                "cached_p95_ms": round(percentile(cached, 95), 2),
+                "errors": errors,
+            }
+    return results
+
+
+def bench_api(repeats):
+    """
+    Calls each endpoint in-process: the first request, then `repeats` with the response
+    cache emptied before each (query latency) and `repeats` served from it (cache hits).
+    """
+    return asyncio.run(time_endpoints(API_ENDPOINTS, repeats))
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(scale, images, stages, database, workdir, api_repeats, label, output):
+    messages = SCALES[scale] if scale in SCALES else int(scale)
+
+    # Stage modules are only imported below, so they all connect to the scratch database
+    settings.DB_NAME = database
+    os.environ["POSTGRES_DB"] = database
+    if {"load", "enrich", "dbt", "api"} & set(stages):
+        ensure_database(database)
+
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    # Writers append, so output from a previous run would double the dataset
+    for generated in ("data", "scrape"):
+        shutil.rmtree(generated, ignore_errors=True)
+
+    results = {
+        "label": label,
+        "scale": scale,
+        "messages": messages,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "stages": {},
+    }
+
+    logger.info(f"Generating {messages} messages and up to {images} images in {workdir}...")
+    start = time.perf_counter()
+    results["dataset"] = build_dataset(".", messages, images=images)
+    results["dataset"]["seconds"] = round(time.perf_counter() - start, 2)
+
+    runners = {
+        "scrape": lambda: bench_scrape(messages),
+        "load": lambda: bench_load(os.path.join("data", "raw", "telegram_messages")),
+        "enrich": lambda: bench_enrich(os.path.join("data", "raw", "images")),
+        "dbt": bench_dbt,
+        "api": lambda: bench_api(api_repeats),
+    }
+    for stage in STAGES:
+        if stage not in stages:
+            continue
+        logger.info(f"Benchmarking {stage}...")
+        results["stages"][stage] = runners[stage]()
+        logger.info(f"{stage}: {results['stages'][stage]}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", default="10k", help="10k, 100k, 1m or a message count.")
+    parser.add_argument("--images", type=int, default=500)
+    parser.add_argument("--stage", action="append", dest="stages", choices=STAGES)
+    parser.add_argument("--database", default="telehealth_bench")
+    parser.add_argument("--workdir")
+    parser.add_argument("--api-repeats", type=int, default=50)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    main(
+        args.scale,
+        args.images,
+        args.stages or STAGES,
+        args.database,
+        os.path.abspath(args.workdir or f"benchmarks/work/{args.scale}"),
+        args.api_repeats,
+        args.label,
+        os.path.abspath(
+            args.output or f"benchmarks/results/pipeline_{args.scale}_{args.label}.json"
+        ),
+    )
@@ -0,0 +1,157 @@
+"""
+Compares /api/search/messages query latency: the old ILIKE scan vs. the GIN-indexed tsvector search.
+
+Seeds a separate `bench` schema with synthetic messages (1M by default), then runs each query
+shape for a set of keywords and reports p50/p99 latency as JSON.
+
+Usage: python benchmarks/search_latency.py --rows 1000000 --repeats 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from src.config import settings
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+VOCABULARY = [
+    "paracetamol", "amoxicillin", "vitamin", "serum", "lotion", "cream", "sunscreen",
+    "insulin", "ibuprofen", "omeprazole", "syrup", "tablet", "capsule", "delivery",
+    "price", "available", "original", "pharmacy", "skin", "hair", "baby", "mask",
+    "glucose", "monitor", "bandage", "antibiotic", "call", "order", "stock", "new",
+]
+KEYWORDS = ["paracetamol", "vitamin serum", "insulin", "sunscreen cream", "glucose monitor"]
+
+ILIKE_QUERY = """
+    SELECT r.message_id, r.channel_name, r.message_date::date, r.message_text
+    FROM bench.telegram_messages r
+    WHERE r.message_text ILIKE :pattern
+    ORDER BY r.message_date DESC
+    LIMIT 50
+"""
+
+FTS_QUERY = """
+    SELECT r.message_id, r.channel_name, r.message_date::date, r.message_text,
+           ts_rank_cd(r.message_tsv, q) as rank
+    FROM bench.telegram_messages r,
+         websearch_to_tsquery('simple', :keyword) q
+    WHERE r.message_tsv @@ q
+    ORDER BY rank DESC, r.message_date DESC
+    LIMIT 50
+"""
+
+
+def seed(connection, rows):
+    """
+    Creates bench.telegram_messages with the loader's search column and index, filled server-side.
+    """
+    connection.execute(text("CREATE SCHEMA IF NOT EXISTS bench;"))
+    connection.execute(text("DROP TABLE IF EXISTS bench.telegram_messages;"))
+    connection.execute(
+        text("""
+            CREATE TABLE bench.telegram_messages (
+                message_id BIGINT,
+                channel_name TEXT,
+                message_date TIMESTAMPTZ,
+                message_text TEXT,
+                message_tsv tsvector GENERATED ALWAYS AS
+                    (to_tsvector('simple', coalesce(message_text, ''))) STORED
+            );
+        """)
+    )
+    connection.execute(
+        text("""
+            INSERT INTO bench.telegram_messages (message_id, channel_name, message_date, message_text)
+            SELECT
+                g,
+                (ARRAY['lobelia4cosmetics', 'tikvahpharma', 'CheMed123'])[1 + g % 3],
+                now() - make_interval(mins => g),
+                (
+                    SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+                    FROM generate_series(1, 8 + g % 24)
+                )
+            FROM generate_series(1, :rows) g,
+                 (SELECT CAST(:vocabulary AS text[]) AS w) v;
+        """),
+        {"rows": rows, "vocabulary": VOCABULARY},
+    )
+    connection.execute(
+        text("CREATE INDEX ON bench.telegram_messages USING GIN (message_tsv);")
+    )
+    connection.execute(text("ANALYZE bench.telegram_messages;"))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def time_query(connection, sql, params, repeats):
+    """
+    Returns per-call latencies in milliseconds (after one warm-up call).
+    """
+    statement = text(sql)
+    connection.execute(statement, params).fetchall()
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        connection.execute(statement, params).fetchall()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(rows, repeats, output, skip_seed=False):
+    engine = create_engine(settings.DB_CONNECTION_STR)
+
+    if not skip_seed:
+        logger.info(f"Seeding bench.telegram_messages with {rows} rows...")
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            seed(connection, rows)
+        logger.info(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+    results = {"rows": rows, "repeats": repeats, "queries": {}}
+    with engine.connect() as connection:
+        for name, sql, make_params in [
+            ("ilike", ILIKE_QUERY, lambda k: {"pattern": f"%{k}%"}),
+            ("fts", FTS_QUERY, lambda k: {"keyword": k}),
+        ]:
+            latencies = []
+            for keyword in KEYWORDS:
+                latencies.extend(time_query(connection, sql, make_params(keyword), repeats))
+
+            results["queries"][name] = {
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "calls": len(latencies),
+            }
+            logger.info(f"{name}: {results['queries'][name]}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--output", default="benchmarks/results/search_latency.json")
+    parser.add_argument(
+        "--skip-seed", action="store_true", help="Reuse an existing bench table."
+    )
+    args = parser.parse_args()
+
+    main(args.rows, args.repeats, args.output, skip_seed=args.skip_seed)
@@ -0,0 +1,142 @@
+"""
+Startup time of the CLI and the API.
+
+Runs each target in a fresh interpreter `--repeats` times and reports wall time (median and
+min), then runs it once more under `python -X importtime` and summarizes the import cost:
+total, per top-level package and the slowest modules (cumulative). Targets:
+  cli_help          python -m src --help
+  cli_enrich_help   python -m src enrich --help
+  enrich_import     import src.enrichment.yolo_detect (what a Dagster op pays before running)
+  api_cold_start    import api.main and create the engine (no connection is opened)
+
+Run it before and after a change (different `--label`) and compare the JSON.
+
+Usage: python benchmarks/startup_time.py --repeats 10 --label after
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+TARGETS = {
+    "cli_help": ["-m", "src", "--help"],
+    "cli_enrich_help": ["-m", "src", "enrich", "--help"],
+    "enrich_import": ["-c", "import src.enrichment.yolo_detect"],
+    "api_cold_start": [
+        "-c",
+        "import api.main, api.database; api.database.init_engine()",
+    ],
+}
+
+
+def run_target(args, importtime=False):
+    """
+    Runs python with args from the repo root; returns (wall seconds, stderr).
+    """
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), *args]
+    start = time.perf_counter()
+    result = subprocess.run(
+        command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Returns [(module, self_us, cumulative_us, depth)] from `-X importtime` output.
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def summarize_imports(modules, top):
+    """
+    Total import time, self time per top-level package and the slowest top-level imports.
+    """
+    packages = {}
+    for name, self_us, _, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    # Depth 0 entries are what the target imported directly; their cumulative time is the
+    # whole subtree, so they sum to the total
+    roots = sorted(
+        ((name, cumulative_us) for name, _, cumulative_us, depth in modules if depth == 0),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "modules": len(modules),
+        "total_ms": round(sum(self_us for _, self_us, _, _ in modules) / 1000, 1),
+        "packages_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in roots[:top]},
+    }
+
+
+def main(targets, repeats, top, label, output):
+    results = {"label": label, "python": sys.version.split()[0], "targets": {}}
+
+    for name in targets:
+        args = TARGETS[name]
+        logger.info(f"Timing {name} ({' '.join(args)})...")
+        try:
+            run_target(args)  # warm the filesystem cache and .pyc files
+            samples = [run_target(args)[0] for _ in range(repeats)]
+            _, stderr = run_target(args, importtime=True)
+        except RuntimeError as e:
+            logger.error(str(e))
+            results["targets"][name] = {"error": str(e)}
+            continue
+
+        results["targets"][name] = {
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+            "imports": summarize_imports(parse_importtime(stderr), top),
+        }
+        logger.info(f"[{label}] {name}: {results['targets'][name]}")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target", action="append", dest="targets", choices=list(TARGETS))
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="Packages/modules to list.")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    main(
+        args.targets or list(TARGETS),
+        args.repeats,
+        args.top,
+        args.label,
+        args.output or f"benchmarks/results/startup_time_{args.label}.json",
+    )
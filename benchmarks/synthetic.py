@@ -0,0 +1,228 @@
+"""
+Synthetic Telegram data for the benchmarks, generated offline and deterministically.
+
+- `build_dataset` writes message files in the scraper's layout
+  (data/raw/telegram_messages/YYYY-MM-DD/{channel}.ndjson) plus JPEGs under data/raw/images/.
+- `StubTelegramClient` stands in for telethon's TelegramClient, serving generated messages
+  and photos so the real scraper can run without network access or credentials.
+"""
+import os
+import sys
+import random
+from datetime import datetime, timedelta, timezone
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from src.collectors.writers import open_writer
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+CHANNELS = {
+    "lobelia4cosmetics": "Lobelia Cosmetics",
+    "tikvahpharma": "Tikvah Pharma",
+    "CheMed123": "CheMed Telegram Channel",
+}
+
+VOCABULARY = [
+    "paracetamol", "amoxicillin", "vitamin", "serum", "lotion", "cream", "sunscreen",
+    "insulin", "ibuprofen", "omeprazole", "syrup", "tablet", "capsule", "delivery",
+    "price", "available", "original", "pharmacy", "skin", "hair", "baby", "mask",
+    "glucose", "monitor", "bandage", "antibiotic", "call", "order", "stock", "new",
+]
+
+# Messages are spread over this many days (one directory per day)
+DAYS = 90
+FLUSH_EVERY = 5000
+
+
+def make_message(rng, message_id, channel, date, media_ratio):
+    """
+    Returns one message dict in the scraper's output format (image_path is filled in later).
+    """
+    words = rng.choices(VOCABULARY, k=rng.randint(3, 40))
+    if rng.random() < 0.5:
+        words.append(f"{rng.randint(50, 5000)} ETB")
+    return {
+        "message_id": message_id,
+        "channel_name": channel,
+        "channel_title": CHANNELS.get(channel, channel),
+        "message_date": date.isoformat(),
+        "message_text": " ".join(words),
+        "has_media": rng.random() < media_ratio,
+        "image_path": None,
+        "views": int(rng.paretovariate(1.5) * 100),
+        "forwards": rng.randint(0, 50),
+    }
+
+
+def generate_messages(count, media_ratio=0.3, seed=42, end=None):
+    """
+    Yields `count` messages round-robin across CHANNELS, oldest first,
+    with message_ids increasing per channel and dates spread over the last DAYS days.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(days=DAYS)
+    step = (end - start) / max(count, 1)
+    channels = list(CHANNELS)
+
+    for i in range(count):
+        channel = channels[i % len(channels)]
+        message_id = i // len(channels) + 1
+        yield make_message(rng, message_id, channel, start + step * i, media_ratio)
+
+
+def make_jpeg(rng, width=640, height=480, quality=85):
+    """
+    Encodes a random JPEG: a gradient background with a few filled shapes,
+    so every image decodes to different pixels.
+    """
+    gradient = np.linspace(0, 255, width, dtype=np.uint8)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    for channel in range(3):
+        image[:, :, channel] = np.roll(gradient, rng.randrange(width))[None, :]
+
+    for _ in range(rng.randint(2, 6)):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        x, y = rng.randrange(width), rng.randrange(height)
+        if rng.random() < 0.5:
+            cv2.rectangle(image, (x, y), (x + rng.randint(20, 200), y + rng.randint(20, 200)), color, -1)
+        else:
+            cv2.circle(image, (x, y), rng.randint(10, 120), color, -1)
+
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return encoded.tobytes()
+
+
+def build_dataset(root, count, images=500, output_format="ndjson", media_ratio=0.3, seed=42):
+    """
+    Writes `count` synthetic messages under {root}/data/raw/telegram_messages/ and a JPEG for
+    each of the first `images` media messages under {root}/data/raw/images/.
+    Returns {"messages", "images", "files", "bytes"}.
+    """
+    messages_dir = os.path.join(root, "data", "raw", "telegram_messages")
+    image_dir = os.path.join(root, "data", "raw", "images")
+    rng = random.Random(seed)
+
+    writers = {}
+    buffers = {}
+    stats = {"messages": 0, "images": 0}
+
+    def flush(key):
+        if key not in writers:
+            day_dir = os.path.join(messages_dir, key[0])
+            os.makedirs(day_dir, exist_ok=True)
+            writers[key] = open_writer(output_format, day_dir, key[1])
+        writers[key].write(buffers.pop(key))
+
+    for msg in generate_messages(count, media_ratio, seed):
+        if msg["has_media"] and stats["images"] < images:
+            channel_dir = os.path.join(image_dir, msg["channel_name"])
+            os.makedirs(channel_dir, exist_ok=True)
+            path = os.path.join(channel_dir, f"{msg['message_id']}.jpg")
+            with open(path, "wb") as f:
+                f.write(make_jpeg(rng))
+            # Relative to the root, as the scraper records it
+            msg["image_path"] = os.path.relpath(path, root)
+            stats["images"] += 1
+
+        key = (msg["message_date"][:10], msg["channel_name"])
+        buffers.setdefault(key, []).append(msg)
+        if len(buffers[key]) >= FLUSH_EVERY:
+            flush(key)
+        stats["messages"] += 1
+
+    for key in list(buffers):
+        flush(key)
+
+    files = []
+    for dirpath, _, filenames in os.walk(messages_dir):
+        files.extend(os.path.join(dirpath, name) for name in filenames)
+    stats["files"] = len(files)
+    stats["bytes"] = sum(os.path.getsize(path) for path in files)
+    return stats
+
+
+class StubEntity:
+    def __init__(self, title):
+        self.title = title
+
+
+class StubMessage:
+    """
+    The subset of telethon's Message the scraper reads.
+    """
+
+    def __init__(self, record, photo):
+        self.id = record["message_id"]
+        self.date = datetime.fromisoformat(record["message_date"])
+        self.message = record["message_text"]
+        self.views = record["views"]
+        self.forwards = record["forwards"]
+        self.photo = photo
+
+    async def download_media(self, file):
+        with open(file, "wb") as f:
+            f.write(self.photo)
+        return file
+
+
+class StubTelegramClient:
+    """
+    Drop-in for telethon.TelegramClient in benchmarks: same constructor and async context
+    manager, and the calls the scraper makes (get_entity, iter_messages, get_messages,
+    download_media).
+    Each channel serves `messages_per_channel` generated messages; photos come from a small
+    pool of pre-encoded JPEGs.
+    """
+
+    def __init__(self, session, api_id, api_hash, messages_per_channel=1000,
+                 media_ratio=0.3, seed=42, **kwargs):
+        self.messages_per_channel = messages_per_channel
+        self.media_ratio = media_ratio
+        self.seed = seed
+        rng = random.Random(seed)
+        self.photos = [make_jpeg(rng) for _ in range(16)]
+        self.end = datetime.now(timezone.utc).replace(microsecond=0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get_entity(self, username):
+        channel = username.strip("@")
+        return StubEntity(CHANNELS.get(channel, channel))
+
+    def _message(self, entity, message_id):
+        channel = next((c for c, title in CHANNELS.items() if title == entity.title), entity.title)
+        # Seeded per message, so a resumed iteration serves the same content
+        rng = random.Random(f"{self.seed}:{channel}:{message_id}")
+        step = timedelta(days=DAYS) / self.messages_per_channel
+        date = self.end - step * (self.messages_per_channel - message_id)
+        record = make_message(rng, message_id, channel, date, self.media_ratio)
+        photo = self.photos[message_id % len(self.photos)] if record["has_media"] else None
+        return StubMessage(record, photo)
+
+    async def iter_messages(self, entity, limit=None, offset_id=0, min_id=0, reverse=False,
+                            **kwargs):
+        ids = range(max(offset_id, min_id) + 1, self.messages_per_channel + 1)
+        if not reverse:
+            ids = reversed(ids)
+
+        for served, message_id in enumerate(ids):
+            if limit is not None and served >= limit:
+                return
+            yield self._message(entity, message_id)
+
+    async def get_messages(self, entity, ids):
+        return [
+            self._message(entity, message_id)
+            if 0 < message_id <= self.messages_per_channel else None
+            for message_id in ids
+        ]
@@ -0,0 +1,14 @@
+{#
+    Splits lower-cased text into runs of letters, digits and underscores, in any script,
+    matching the API's former Python tokenizer (re.findall(r"\w+", text.lower())).
+    Postgres classifies and lower-cases characters by collation, and the C collation only
+    knows ASCII (it splits Amharic words apart), so the text is given the Unicode-aware
+    collation in var('token_collation'): ICU's "und-x-icu" by default, or a libc UTF-8
+    locale such as "en_US.utf8" on servers built without ICU.
+    Non-decimal numerals (e.g. Ethiopic digits), which Python also counted, split tokens.
+#}
+{% macro split_tokens(text) %}
+    regexp_split_to_table(
+        lower({{ text }} collate "{{ var('token_collation') }}"), '[^[:alnum:]_]+'
+    )
+{% endmacro %}
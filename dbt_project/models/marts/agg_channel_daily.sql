@@ -0,0 +1,60 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['channel_key', 'date_key'],
+        incremental_strategy='delete+insert',
+        indexes=[
+            {'columns': ['channel_name', 'date_key'], 'unique': True}
+        ]
+    )
+}}
+
+-- One row per channel per day, pre-aggregated for the channel activity endpoint.
+with messages as (
+    select * from {{ ref('fct_messages') }}
+    {% if is_incremental() %}
+    -- Re-aggregate every (channel, day) that received new or changed messages, including
+    -- late-committed ones within the lookback (see watermark_lookback)
+    where (channel_key, date_key) in (
+        select distinct channel_key, date_key
+        from {{ ref('fct_messages') }}
+        where loaded_at > (
+            select coalesce(max(loaded_at), '1900-01-01'::timestamptz)
+                - interval '{{ var("watermark_lookback") }}'
+            from {{ this }}
+        )
+    )
+    {% endif %}
+),
+
+daily as (
+    select
+        channel_key,
+        channel_name,
+        date_key,
+        count(*) as post_count,
+        sum(view_count) as view_sum,
+        sum(forward_count) as forward_sum,
+        count(*) filter (where has_media) as media_post_count,
+        max(loaded_at) as loaded_at
+    from messages
+    where date_key is not null
+    group by 1, 2, 3
+),
+
+final as (
+    select
+        channel_key,
+        channel_name,
+        date_key,
+        to_date(date_key::text, 'YYYYMMDD') as date_day,
+        post_count,
+        view_sum,
+        forward_sum,
+        media_post_count,
+        round(media_post_count::numeric / post_count, 4) as media_share,
+        loaded_at
+    from daily
+)
+
+select * from final
@@ -1,21 +1,52 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['channel_name', 'message_id'],
+        incremental_strategy='delete+insert',
+        indexes=[
+            {'columns': ['channel_name', 'message_id'], 'unique': True},
+            {'columns': ['coalesce(date_key, 0)', 'message_id', 'channel_name']},
+            {'columns': ['channel_key', 'message_id']},
+            {'columns': ['image_category']}
+        ]
+    )
+}}
+
 with raw_detections as (
-    select * from {{ source('raw', 'image_detections') }}
+    select * from {{ source('raw', 'image_detections') }} r
+    {% if is_incremental() %}
+    -- New or re-enriched images (including enrich runs that committed late, see
+    -- watermark_lookback), plus detections whose message had not been loaded yet
+    where r.detected_at > (
+        select coalesce(max(detected_at), '1900-01-01'::timestamptz)
+            - interval '{{ var("watermark_lookback") }}'
+        from {{ this }}
+    )
+       or (r.channel_name, r.message_id) in (
+            select channel_name, message_id from {{ this }} where date_key is null
+       )
+    {% endif %}
 ),
 
 messages as (
-    select * from {{ ref('fct_messages') }}
+    select message_id, channel_name, date_key from {{ ref('fct_messages') }}
 ),
 
 final as (
     select
         r.message_id,
-        m.channel_key,
+        r.channel_name,
+        md5(r.channel_name) as channel_key,
         m.date_key,
         r.detected_class,
         r.confidence as confidence_score,
-        r.image_category
+        r.image_category,
+        r.detected_at
     from raw_detections r
-    left join messages m on r.message_id::text = m.message_id::text
+    -- Typed composite key: message_ids are only unique within a channel
+    left join messages m
+        on m.channel_name = r.channel_name
+        and m.message_id = r.message_id
 )
 
 select * from final
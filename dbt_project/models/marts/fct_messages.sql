@@ -1,17 +1,41 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['message_id', 'channel_name'],
+        incremental_strategy='delete+insert',
+        indexes=[
+            {'columns': ['channel_name', 'message_id'], 'unique': True},
+            {'columns': ['coalesce(date_key, 0)', 'message_id', 'channel_name']},
+            {'columns': ['loaded_at']}
+        ]
+    )
+}}
+
 with stg_data as (
     select * from {{ ref('stg_telegram') }}
+    {% if is_incremental() %}
+    -- Only messages inserted or changed by the loader since the last build, give or take
+    -- the lookback for loads that committed late (see watermark_lookback)
+    where loaded_at > (
+        select coalesce(max(loaded_at), '1900-01-01'::timestamptz)
+            - interval '{{ var("watermark_lookback") }}'
+        from {{ this }}
+    )
+    {% endif %}
 ),
 
 final as (
     select
         message_id,
+        channel_name,
         md5(channel_name) as channel_key,
         to_char(message_date, 'YYYYMMDD')::int as date_key,
         view_count,
         forward_count,
         message_length,
         has_image,
-        has_media
+        has_media,
+        loaded_at
     from stg_data
 )
 
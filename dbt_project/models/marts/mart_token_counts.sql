@@ -0,0 +1,24 @@
+{{ config(indexes=[{'columns': ['token_count']}]) }}
+
+-- Token frequencies over all message texts, computed once per dbt run.
+-- Tokens longer than 3 characters, split as by the API's former tokenizer (see split_tokens).
+with stg_data as (
+    select message_text from {{ ref('stg_telegram') }}
+),
+
+tokens as (
+    select t.token
+    from stg_data s
+    cross join lateral {{ split_tokens('s.message_text') }} as t(token)
+),
+
+final as (
+    select
+        token,
+        count(*) as token_count
+    from tokens
+    where length(token) > 3
+    group by 1
+)
+
+select * from final
@@ -12,7 +12,8 @@ renamed as (
         has_media,
         image_path,
         views as view_count,
-        forwards as forward_count
+        forwards as forward_count,
+        loaded_at
     from source
 ),
 
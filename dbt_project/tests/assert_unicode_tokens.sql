@@ -0,0 +1,13 @@
+-- mart_token_counts needs a Unicode-aware token_collation: Amharic letters must be word
+-- characters, and non-ASCII capitals must be lower-cased
+with tokens as (
+    select array(
+        select token
+        from {{ split_tokens("'ፓራሲታሞል, Ämoxicillin_500mg!'") }} as t(token)
+        where token <> ''
+    ) as tokens
+)
+
+select *
+from tokens
+where tokens <> array['ፓራሲታሞል', 'ämoxicillin_500mg']
@@ -0,0 +1,8 @@
+-- One detection per message: message_id is only unique within a channel
+select
+    channel_key,
+    message_id,
+    count(*) as occurrences
+from {{ ref('fct_image_detections') }}
+group by 1, 2
+having count(*) > 1
@@ -0,0 +1,8 @@
+-- message_id is only unique within a channel
+select
+    message_id,
+    channel_name,
+    count(*) as occurrences
+from {{ ref('fct_messages') }}
+group by 1, 2
+having count(*) > 1
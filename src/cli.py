@@ -0,0 +1,165 @@
+"""
+Pipeline command line: python -m src {scrape,load,enrich,serve-model,transform} [options].
+
+Only argparse is imported up front; each subcommand imports its stage module (and so
+telethon, pandas, OpenCV, the model backend or dbt) when it runs, so `--help` is instant.
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+logger = logging.getLogger(__name__)
+
+
+def scrape(args):
+    import asyncio
+
+    from src.collectors import telegram_scraper
+    from src.logging_setup import configure_logging
+
+    configure_logging(telegram_scraper.LOG_FILE, "src.collectors")
+    channels = [c if c.startswith("@") else f"@{c}" for c in args.channels or []]
+    return asyncio.run(telegram_scraper.main(channels=channels or None))
+
+
+def load(args):
+    from src.loaders import postgres_loader
+    from src.logging_setup import configure_logging
+
+    configure_logging()
+    return postgres_loader.main(full_refresh=args.full_refresh, partition_date=args.date)
+
+
+def enrich(args):
+    from src.enrichment import yolo_detect
+    from src.logging_setup import configure_logging
+
+    configure_logging(yolo_detect.LOG_FILE, "src.enrichment")
+    channels = [c.lstrip("@") for c in args.channels or []] or None
+
+    if not args.compare:
+        return yolo_detect.main(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            channels=channels,
+            partition_date=args.date,
+        )
+
+    images = yolo_detect.find_images(channels=channels, partition_date=args.date)
+    sample = sorted(images)[: args.sample]
+    report = yolo_detect.compare_backends(sample, args.compare, batch_size=args.batch_size)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    logger.info(f"Backend comparison: {report} (written to {args.output})")
+    return report
+
+
+def serve_model(args):
+    from src.enrichment import model_server, yolo_detect
+    from src.logging_setup import configure_logging
+
+    configure_logging(yolo_detect.LOG_FILE, "src.enrichment")
+    model_server.serve(
+        host=args.host,
+        port=args.port,
+        uds=args.uds,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+    )
+    return 0
+
+
+def transform(args):
+    from src.logging_setup import configure_logging
+    from src.orchestration.dbt_build import dbt_build, record_pipeline_run
+
+    configure_logging()
+    dbt_args = ["--full-refresh"] if args.full_refresh else []
+    if args.select:
+        dbt_args += ["--select", *args.select]
+    try:
+        stats = dbt_build(logger, dbt_args)
+    except RuntimeError as e:
+        logger.error(str(e))
+        return None
+
+    run_id = record_pipeline_run()
+    logger.info(f"Recorded pipeline run {run_id}; API caches will refresh.")
+    return stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src", description="Run one stage of the TeleHealth pipeline."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("scrape", help="Scrape Telegram channels.")
+    command.add_argument(
+        "--channel", action="append", dest="channels",
+        help="Channel to scrape (repeatable; default: TELEGRAM_CHANNELS).",
+    )
+    command.set_defaults(handler=scrape)
+
+    command = commands.add_parser("load", help="Load scraped messages into Postgres.")
+    command.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Truncate raw.telegram_messages and reload every file, ignoring watermarks.",
+    )
+    command.add_argument("--date", help="Only load the YYYY-MM-DD partition directory.")
+    command.set_defaults(handler=load)
+
+    command = commands.add_parser("enrich", help="Run YOLO enrichment on scraped images.")
+    command.add_argument("--workers", type=int, help="Number of inference processes.")
+    command.add_argument("--batch-size", type=int, help="Images per model call.")
+    command.add_argument("--date", help="Only enrich images of the YYYY-MM-DD partition.")
+    command.add_argument(
+        "--channel", action="append", dest="channels",
+        help="Only enrich this channel's images (repeatable).",
+    )
+    command.add_argument(
+        "--compare",
+        # yolo_detector.BACKENDS minus torch, spelled out so --help skips OpenCV/numpy
+        choices=["onnx", "onnx-int8"],
+        help="Instead of enriching, compare this backend against torch on a sample.",
+    )
+    command.add_argument("--sample", type=int, default=200, help="Images to compare.")
+    command.add_argument("--output", default="logs/backend_comparison.json")
+    command.set_defaults(handler=enrich)
+
+    command = commands.add_parser(
+        "serve-model", help="Serve the YOLO model to enrichment and /api/classify."
+    )
+    command.add_argument("--host", help="Default: YOLO_SERVER_HOST.")
+    command.add_argument("--port", type=int, help="Default: YOLO_SERVER_PORT.")
+    command.add_argument("--uds", help="Listen on this Unix socket instead of host:port.")
+    command.add_argument("--max-batch", type=int, help="Default: YOLO_SERVER_MAX_BATCH.")
+    command.add_argument(
+        "--max-wait-ms", type=float, help="Batch window; default: YOLO_SERVER_MAX_WAIT_MS."
+    )
+    command.set_defaults(handler=serve_model)
+
+    command = commands.add_parser("transform", help="Run dbt build and record the run.")
+    command.add_argument(
+        "--full-refresh", action="store_true", help="Rebuild incremental models."
+    )
+    command.add_argument(
+        "--select", nargs="+", help="dbt node selection (default: every model and test)."
+    )
+    command.set_defaults(handler=transform)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Runs the subcommand in argv; returns the exit code (1 if the stage failed).
+    """
+    args = build_parser().parse_args(argv)
+    return 0 if args.handler(args) is not None else 1
@@ -0,0 +1,82 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """
+    Last seen message_id per channel, and the messages whose photo download failed
+    (retried on the next run), persisted as one small JSON file per channel
+    (so channels scraped by separate processes never overwrite each other's checkpoint).
+    Writes go to a temp file and are renamed into place, so a crash never leaves a partial checkpoint.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.checkpoints = {}
+
+    def _path(self, channel):
+        return os.path.join(self.directory, f"{channel}.json")
+
+    def _read(self, channel):
+        path = self._path(channel)
+        state = {"last_message_id": 0, "failed_downloads": []}
+        if not os.path.exists(path):
+            return state
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            state["last_message_id"] = data["last_message_id"]
+            state["failed_downloads"] = data.get("failed_downloads", [])
+        except Exception as e:
+            logger.error(f"Could not read checkpoint from {path}: {e}")
+        return state
+
+    def _write(self, channel):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(channel)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.checkpoints[channel], f, indent=4)
+        os.replace(tmp_path, path)
+
+    def _state(self, channel):
+        if channel not in self.checkpoints:
+            self.checkpoints[channel] = self._read(channel)
+        return self.checkpoints[channel]
+
+    def get(self, channel):
+        """
+        Returns the last seen message_id for a channel (0 if it was never scraped).
+        """
+        return self._state(channel)["last_message_id"]
+
+    def failed_downloads(self, channel):
+        """
+        Returns the message_ids whose photo download failed, oldest first.
+        """
+        return list(self._state(channel)["failed_downloads"])
+
+    def update(self, channel, message_id, failed_downloads=()):
+        """
+        Advances a channel's checkpoint (never moves it backwards), records the message_ids
+        whose photo download failed up to it, and persists both in one write.
+        """
+        state = self._state(channel)
+        failed = sorted(set(state["failed_downloads"]) | set(failed_downloads))
+        if message_id > state["last_message_id"] or failed != state["failed_downloads"]:
+            state["last_message_id"] = max(message_id, state["last_message_id"])
+            state["failed_downloads"] = failed
+            self._write(channel)
+
+    def set_failed_downloads(self, channel, message_ids):
+        """
+        Replaces the failed downloads of a channel (after a retry) and persists them.
+        """
+        state = self._state(channel)
+        failed = sorted(set(message_ids))
+        if failed != state["failed_downloads"]:
+            state["failed_downloads"] = failed
+            self._write(channel)
@@ -0,0 +1,109 @@
+import os
+import time
+import asyncio
+import logging
+
+from src.instrumentation import counter, histogram
+
+logger = logging.getLogger(__name__)
+
+MEDIA_BYTES = counter("scraper_media_bytes_total", "Bytes of media downloaded")
+MEDIA_DOWNLOADS = counter("scraper_media_downloads_total", "Media downloads by outcome", ["status"])
+DOWNLOAD_SECONDS = histogram("scraper_media_download_seconds", "Time to download one photo")
+
+
+class MediaDownloader:
+    """
+    Producer/consumer pool for photo downloads, decoupled from message iteration.
+    Producers put jobs on a bounded queue (and block when it is full); worker tasks
+    download each photo to a temp file and rename it into place atomically.
+    """
+
+    def __init__(self, download, workers=4, queue_size=100):
+        # download(message, file) -> awaitable returning the written path
+        self.download = download
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks = []
+
+        # Metrics
+        self.started_at = None
+        self.downloaded = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self.max_queue_depth = 0
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, message, target_path):
+        """
+        Queues a photo download. Returns a future resolving to the final path,
+        or None if the download failed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((message, target_path, future))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return future
+
+    async def _worker(self):
+        while True:
+            message, target_path, future = await self.queue.get()
+            try:
+                with DOWNLOAD_SECONDS.time():
+                    path = await self._download(message, target_path)
+                size = os.path.getsize(path)
+                self.downloaded += 1
+                self.bytes_downloaded += size
+                MEDIA_BYTES.inc(size)
+                MEDIA_DOWNLOADS.inc(status="ok")
+                future.set_result(path)
+            except Exception as e:
+                self.failed += 1
+                MEDIA_DOWNLOADS.inc(status="failed")
+                logger.error(f"Failed to download media to {target_path}: {e}")
+                future.set_result(None)
+            finally:
+                self.queue.task_done()
+
+    async def _download(self, message, target_path):
+        tmp_path = f"{target_path}.part"
+        try:
+            written = await self.download(message, tmp_path)
+            if not written:
+                raise ValueError("message has no downloadable media")
+            # Readers never see a partially written image
+            os.replace(written, target_path)
+            return target_path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stats(self):
+        """
+        Returns throughput and queue-depth metrics for the pool.
+        """
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "downloaded": self.downloaded,
+            "failed": self.failed,
+            "bytes_downloaded": self.bytes_downloaded,
+            "elapsed_seconds": round(elapsed, 2),
+            "files_per_sec": round(self.downloaded / elapsed, 2) if elapsed else 0.0,
+            "mb_per_sec": (
+                round(self.bytes_downloaded / elapsed / 1e6, 2) if elapsed else 0.0
+            ),
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    async def close(self):
+        """
+        Waits for queued downloads to finish, then stops the workers.
+        """
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info(f"Media downloads finished: {self.stats()}")
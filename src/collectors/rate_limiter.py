@@ -0,0 +1,68 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter, shared by every task that uses one Telegram client.
+    Each API call takes a token; tokens refill at `rate` per second up to `burst`.
+    On FloodWait all callers are paused for the requested time and the rate is halved,
+    then it recovers gradually with each successful call.
+    """
+
+    def __init__(self, rate, burst, min_rate=0.2, recovery=1.05):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min(min_rate, rate)
+        self.recovery = recovery
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens=1):
+        """
+        Waits until `tokens` are available (and any FloodWait pause is over), then takes them.
+        Waiters are served in arrival order.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+    def on_success(self):
+        """
+        Gradual recovery towards the configured rate after a successful call.
+        """
+        self.rate = min(self.max_rate, self.rate * self.recovery)
+
+    def on_flood_wait(self, seconds):
+        """
+        Pauses every caller for `seconds` and halves the rate (multiplicative decrease).
+        """
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.rate = max(self.min_rate, self.rate / 2)
+        # No tokens accrue while paused
+        self.tokens = 0
+        self.updated = self.paused_until
+        logger.warning(
+            f"FloodWait of {seconds}s: pausing requests, rate lowered to {self.rate:.2f}/s"
+        )
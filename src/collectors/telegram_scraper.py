@@ -1,43 +1,200 @@
 import os
-import json
+import time
 import asyncio
 import logging
-import random
-from datetime import datetime
+import functools
+import contextlib
+from datetime import datetime, timezone
 import sys
 
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 from src.config import settings
+from src.collectors.rate_limiter import TokenBucket
+from src.collectors.checkpoints import CheckpointStore
+from src.collectors.media_downloader import MediaDownloader
+from src.collectors.writers import open_writer
+from src.instrumentation import counter, histogram, write_run_summary
 
-# Create logs directory
-os.makedirs("logs", exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("logs/scraper.log"), logging.StreamHandler()],
-)
 logger = logging.getLogger(__name__)
+LOG_FILE = "logs/scraper.log"
 
 API_ID = settings.TG_API_ID
 API_HASH = settings.TG_API_HASH
 
-CHANNELS = ["@lobelia4cosmetics", "@tikvahpharma", "@CheMed123"]
-LIMIT = 100
+CHANNELS = settings.TELEGRAM_CHANNELS
+
+# Messages are written and the channel checkpoint advanced every FLUSH_EVERY messages
+FLUSH_EVERY = 500
+
+# Telethon session, stored as {SESSION_NAME}.session (SQLite) in the working directory
+SESSION_NAME = "anon"
+
+# Telethon requests channel history in pages of this many messages
+PAGE_SIZE = 100
+MAX_FLOOD_RETRIES = 5
+
+MESSAGES_SCRAPED = counter("scraper_messages_total", "Messages scraped and written", ["channel"])
+FLOOD_WAITS = counter("scraper_flood_waits_total", "FloodWait responses from Telegram")
+WRITE_SECONDS = histogram("scraper_write_seconds", "Time to write one batch of messages")
+
+
+async def call_limited(limiter, func, *args, **kwargs):
+    """
+    Awaits a Telegram API call through the shared rate limiter, retrying after FloodWait.
+    """
+    for attempt in range(MAX_FLOOD_RETRIES + 1):
+        await limiter.acquire()
+        try:
+            result = await func(*args, **kwargs)
+        except FloodWaitError as e:
+            if attempt == MAX_FLOOD_RETRIES:
+                raise
+            FLOOD_WAITS.inc()
+            limiter.on_flood_wait(e.seconds)
+            continue
+
+        limiter.on_success()
+        return result
+
+
+async def download_media_limited(limiter, message, file):
+    """
+    Downloads a message's media through the shared rate limiter.
+    """
+    return await call_limited(limiter, message.download_media, file=file)
+
+
+async def wait_for_downloads(pending_downloads):
+    """
+    Waits for queued photo downloads and fills in each message's image_path
+    (None if its download failed). Returns the message_ids whose download failed.
+    """
+    paths = await asyncio.gather(*(future for _, future in pending_downloads))
+    failed = []
+    for (msg_data, _), path in zip(pending_downloads, paths):
+        msg_data["image_path"] = path
+        if path is None:
+            failed.append(msg_data["message_id"])
+    return failed
+
+
+def build_record(message, channel_name, channel_title):
+    """
+    Extracts the stored fields of a message; image_path is filled in once its photo is on disk.
+    """
+    return {
+        "message_id": message.id,
+        "channel_name": channel_name,  # Using the username as unique identifier key usually better
+        "channel_title": channel_title,  # Keeping title for context
+        "message_date": message.date.isoformat() if message.date else None,
+        "message_text": message.message,
+        "has_media": bool(message.photo),
+        "image_path": None,
+        "views": message.views if message.views else 0,
+        "forwards": message.forwards if message.forwards else 0,
+    }
+
+
+async def retry_failed_downloads(client, entity, limiter, checkpoints, downloader, writer,
+                                 channel_name, channel_title, image_dir):
+    """
+    Retries the photo downloads that failed in earlier runs (they are behind the checkpoint,
+    so the history scan never sees them again). Messages whose photo now downloads are
+    written again with their image_path; the loader merges them over the earlier rows.
+    Returns the number of photos recovered.
+    """
+    message_ids = checkpoints.failed_downloads(channel_name)
+    if not message_ids:
+        return 0
+
+    logger.info(f"{channel_name}: retrying {len(message_ids)} failed photo downloads...")
+    messages = await call_limited(limiter, client.get_messages, entity, ids=message_ids)
+
+    records = []
+    pending_downloads = []
+    for message in messages:
+        # Deleted messages come back as None; nothing left to retry for them
+        if message is None or not message.photo:
+            continue
+        msg_data = build_record(message, channel_name, channel_title)
+        target_img_path = os.path.join(image_dir, f"{message.id}.jpg")
+        if os.path.exists(target_img_path):
+            msg_data["image_path"] = target_img_path
+        else:
+            pending_downloads.append((msg_data, await downloader.submit(message, target_img_path)))
+        records.append(msg_data)
+
+    failed = await wait_for_downloads(pending_downloads)
+    recovered = [msg_data for msg_data in records if msg_data["image_path"]]
+    if recovered:
+        with WRITE_SECONDS.time():
+            writer.write(recovered)
+    checkpoints.set_failed_downloads(channel_name, failed)
+    logger.info(
+        f"{channel_name}: recovered {len(recovered)} photos, {len(failed)} downloads still failing."
+    )
+    return len(recovered)
 
 
-async def scrape_channel(client, channel_username):
+async def iter_messages_limited(client, entity, limiter, limit=None, **kwargs):
+    """
+    Yields channel messages, taking one limiter token per history page.
+    After a FloodWait the iteration resumes from the last message received.
+    """
+    offset_id = kwargs.pop("offset_id", 0)
+    fetched = 0
+    flood_retries = 0
+
+    while True:
+        remaining = None if limit is None else limit - fetched
+        iterator = client.iter_messages(
+            entity, limit=remaining, offset_id=offset_id, wait_time=0, **kwargs
+        ).__aiter__()
+
+        try:
+            while True:
+                if fetched % PAGE_SIZE == 0:
+                    # Next message triggers a history request
+                    await limiter.acquire()
+                    message = await iterator.__anext__()
+                    limiter.on_success()
+                else:
+                    message = await iterator.__anext__()
+
+                fetched += 1
+                offset_id = message.id
+                yield message
+        except StopAsyncIteration:
+            return
+        except FloodWaitError as e:
+            flood_retries += 1
+            if flood_retries > MAX_FLOOD_RETRIES:
+                raise
+            FLOOD_WAITS.inc()
+            limiter.on_flood_wait(e.seconds)
+
+
+async def scrape_channel(client, channel_username, limiter, checkpoints, downloader):
     """
     Scrapes messages from a single Telegram channel with enhanced fields and structure.
+    Only messages newer than the channel's checkpoint are fetched (oldest first), and the
+    checkpoint advances after each flush, so an interrupted backfill resumes where it stopped.
+    Photos are handed to the shared download pool instead of being awaited inline; failed
+    downloads are recorded with the checkpoint and retried at the start of the next run.
+    Messages are streamed to disk in the configured output format at every flush.
+    All API calls go through the shared rate limiter.
+    Returns the number of new messages, or None if the scrape failed.
     """
     try:
         logger.info(f"Starting scrape for {channel_username}...")
-        entity = await client.get_entity(channel_username)
+        entity = await call_limited(limiter, client.get_entity, channel_username)
         channel_title = entity.title
 
-        # Date-based directory for JSONs
-        today_date = datetime.now().strftime("%Y-%m-%d")
+        # Date-based directory for JSONs (UTC, like the Dagster partitions that load it)
+        today_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
         json_dir = f"data/raw/telegram_messages/{today_date}"
         os.makedirs(json_dir, exist_ok=True)
 
@@ -46,83 +203,155 @@ async def scrape_channel(client, channel_username):
         image_dir = f"data/raw/images/{clean_username}"
         os.makedirs(image_dir, exist_ok=True)
 
+        # Save to data/raw/telegram_messages/YYYY-MM-DD/ as NDJSON, Parquet or JSON
+        writer = open_writer(settings.SCRAPER_OUTPUT_FORMAT, json_dir, clean_username)
+
+        await retry_failed_downloads(
+            client, entity, limiter, checkpoints, downloader, writer,
+            clean_username, channel_title, image_dir,
+        )
+
+        min_id = checkpoints.get(clean_username)
+        logger.info(f"Fetching {channel_username} messages after id {min_id}...")
+
         messages_data = []
+        pending_downloads = []
         message_count = 0
 
-        async for message in client.iter_messages(entity, limit=LIMIT):
-            # Extract common fields
+        # With reverse=True, offset_id is an exclusive lower bound (oldest first)
+        async for message in iter_messages_limited(
+            client, entity, limiter, offset_id=min_id, min_id=min_id, reverse=True
+        ):
             msg_id = message.id
-            msg_date = message.date.isoformat() if message.date else None
-            msg_text = message.message
-            views = message.views if message.views else 0
-            forwards = message.forwards if message.forwards else 0
+            msg_data = build_record(message, clean_username, channel_title)
+            download = None
 
             # Media handling
-            has_media = False
-            image_path = None
-
             if message.photo:
-                has_media = True
                 # Download image to specified path: data/raw/images/{channel}/{message_id}.jpg
-                # Telethon download_media can take a specific file path
                 target_img_path = os.path.join(image_dir, f"{msg_id}.jpg")
 
-                # Check if already exists to save bandwidth/time (optional, but good practice)
+                # Check if already exists to save bandwidth/time
                 if not os.path.exists(target_img_path):
-                    path = await message.download_media(file=target_img_path)
-                    image_path = path
+                    # Blocks only when the download queue is full
+                    download = await downloader.submit(message, target_img_path)
                 else:
-                    image_path = target_img_path
-
-            msg_data = {
-                "message_id": msg_id,
-                "channel_name": clean_username,  # Using the username as unique identifier key usually better
-                "channel_title": channel_title,  # Keeping title for context
-                "message_date": msg_date,
-                "message_text": msg_text,
-                "has_media": has_media,
-                "image_path": image_path,
-                "views": views,
-                "forwards": forwards,
-            }
+                    msg_data["image_path"] = target_img_path
 
             messages_data.append(msg_data)
+            if download is not None:
+                pending_downloads.append((msg_data, download))
             message_count += 1
 
-            # Politeness delay
-            await asyncio.sleep(random.uniform(0.5, 1.0))
-
-        # Save to JSON: data/raw/telegram_messages/YYYY-MM-DD/channel.json
-        output_file = f"{json_dir}/{clean_username}.json"
-
-        # If file exists, we might want to append or overwrite.
-        # For simplicity and idempotency in this run, we overwrite with the latest batch.
-        # In a real continuous scraper, we might load existing and append new IDs.
-        # Given the task description implies a run-based scrape, overwriting the daily file for this run is acceptable.
+            if len(messages_data) >= FLUSH_EVERY:
+                # The checkpoint must not pass messages whose photos are still downloading;
+                # failed ones are recorded with it, to be retried
+                failed = await wait_for_downloads(pending_downloads)
+                with WRITE_SECONDS.time():
+                    writer.write(messages_data)
+                MESSAGES_SCRAPED.inc(len(messages_data), channel=clean_username)
+                checkpoints.update(clean_username, msg_id, failed)
+                messages_data = []
+                pending_downloads = []
+                logger.info(f"{channel_username}: media pool {downloader.stats()}")
 
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(messages_data, f, ensure_ascii=False, indent=4)
+        if messages_data:
+            failed = await wait_for_downloads(pending_downloads)
+            with WRITE_SECONDS.time():
+                writer.write(messages_data)
+            MESSAGES_SCRAPED.inc(len(messages_data), channel=clean_username)
+            checkpoints.update(clean_username, messages_data[-1]["message_id"], failed)
 
         logger.info(
-            f"Successfully scraped {message_count} messages from {channel_username}. Saved to {output_file}."
+            f"Successfully scraped {message_count} new messages from {channel_username}. Saved to {writer.path}."
         )
+        return message_count
 
     except Exception as e:
         logger.error(f"Error scraping {channel_username}: {e}")
+        return None
 
 
-async def main():
+@contextlib.asynccontextmanager
+async def session_lock(session_name):
+    """
+    Holds an exclusive lock on the Telegram session for the duration of a scrape. Concurrent
+    scrapes on one host (e.g. parallel Dagster runs) would otherwise share the SQLite session
+    file ("database is locked") and each run its own rate limiter against the same account.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Not on Windows; rely on the Dagster concurrency key there
+        yield
+        return
+
+    with open(f"{session_name}.session.lock", "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("Another scrape is using the Telegram session; waiting for it to finish...")
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+        yield
+
+
+async def main(channels=None):
+    """
+    Scrapes the given channels (default: all configured) and returns run stats,
+    or None if the client could not be started.
+    """
     if not API_ID or not API_HASH:
         logger.critical("API_ID or API_HASH missing in .env file.")
-        return
+        return None
 
+    channels = channels or CHANNELS
+    started = time.perf_counter()
     logger.info("Initializing Telegram Client...")
 
-    # 'anon' session file will be created in current directory
-    async with TelegramClient("anon", API_ID, API_HASH) as client:
-        for channel in CHANNELS:
-            await scrape_channel(client, channel)
+    # One limiter for the whole client: Telegram rate limits per account, not per channel
+    limiter = TokenBucket(settings.SCRAPER_RATE, settings.SCRAPER_BURST)
+    semaphore = asyncio.Semaphore(settings.SCRAPER_CONCURRENCY)
+    checkpoints = CheckpointStore(settings.SCRAPER_CHECKPOINT_DIR)
+
+    async def scrape_with_cap(client, channel):
+        async with semaphore:
+            return await scrape_channel(
+                client, channel, limiter, checkpoints, downloader
+            )
+
+    # 'anon' session file will be created in current directory.
+    # flood_sleep_threshold=0 surfaces every FloodWait to the limiter instead of sleeping silently.
+    # The limiter is per process, so scrapes on one host take turns with the session.
+    async with session_lock(SESSION_NAME), TelegramClient(
+        SESSION_NAME, API_ID, API_HASH, flood_sleep_threshold=0
+    ) as client:
+        # One download pool for all channels, so total download concurrency is bounded
+        downloader = MediaDownloader(
+            functools.partial(download_media_limited, limiter),
+            workers=settings.SCRAPER_DOWNLOAD_WORKERS,
+            queue_size=settings.SCRAPER_DOWNLOAD_QUEUE,
+        )
+        downloader.start()
+        try:
+            counts = await asyncio.gather(
+                *(scrape_with_cap(client, channel) for channel in channels)
+            )
+        finally:
+            await downloader.close()
+
+    download_stats = downloader.stats()
+    stats = {
+        "channels": len(channels),
+        "failed_channels": sum(1 for count in counts if count is None),
+        "messages_scraped": sum(count for count in counts if count),
+        "images_downloaded": download_stats["downloaded"],
+        "media_bytes": download_stats["bytes_downloaded"],
+    }
+    summary_path = write_run_summary("scrape", stats, started, prefix="scraper_")
+    logger.info(f"Run summary written to {summary_path}")
+    return stats
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    from src.cli import main as cli_main
+
+    sys.exit(cli_main(["scrape", *sys.argv[1:]]))
@@ -0,0 +1,153 @@
+import os
+import json
+from datetime import datetime
+
+OUTPUT_FORMATS = ("ndjson", "parquet", "json")
+
+
+class NdjsonWriter:
+    """
+    Appends messages to data/raw/telegram_messages/YYYY-MM-DD/{channel}.ndjson, one JSON object per line.
+    Nothing is buffered beyond the batch being written, and readers can stream the file line by line.
+    """
+
+    def __init__(self, json_dir, channel_name):
+        self.path = os.path.join(json_dir, f"{channel_name}.ndjson")
+
+    def write(self, messages):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for msg in messages:
+                f.write(json.dumps(msg, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetWriter:
+    """
+    Writes each batch of messages as a columnar Parquet part file:
+    data/raw/telegram_messages/YYYY-MM-DD/{channel}-{first_id}-{last_id}.parquet
+    """
+
+    def __init__(self, json_dir, channel_name):
+        # Optional dependency, only needed for this format
+        import pyarrow as pa
+
+        self.json_dir = json_dir
+        self.channel_name = channel_name
+        self.path = os.path.join(json_dir, f"{channel_name}-*.parquet")
+        self.schema = pa.schema(
+            [
+                ("message_id", pa.int64()),
+                ("channel_name", pa.string()),
+                ("channel_title", pa.string()),
+                ("message_date", pa.timestamp("us", tz="UTC")),
+                ("message_text", pa.string()),
+                ("has_media", pa.bool_()),
+                ("image_path", pa.string()),
+                ("views", pa.int64()),
+                ("forwards", pa.int64()),
+            ]
+        )
+
+    def write(self, messages):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = [
+            {
+                **msg,
+                "message_date": (
+                    datetime.fromisoformat(msg["message_date"])
+                    if msg["message_date"]
+                    else None
+                ),
+            }
+            for msg in messages
+        ]
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+
+        first_id, last_id = messages[0]["message_id"], messages[-1]["message_id"]
+        path = os.path.join(
+            self.json_dir, f"{self.channel_name}-{first_id}-{last_id}.parquet"
+        )
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+
+
+class JsonArrayWriter:
+    """
+    Legacy format: one pretty-printed JSON array per channel and day ({channel}.json).
+    Message_ids already in the file are skipped. New messages are appended in place by
+    writing over the closing bracket, so a batch costs its own size, not the file's;
+    unlike ndjson, a crash mid-write can leave the array unterminated.
+    """
+
+    def __init__(self, json_dir, channel_name):
+        self.path = os.path.join(json_dir, f"{channel_name}.json")
+        self.known_ids = None
+
+    def _read_ids(self):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return {msg["message_id"] for msg in json.load(f)}
+
+    def _end_of_items(self, f):
+        """
+        Returns the offset just past the array's last item, i.e. where its closing bracket
+        (and the whitespace before it) starts.
+        """
+        f.seek(0, os.SEEK_END)
+        start = max(0, f.tell() - 64)
+        f.seek(start)
+        tail = f.read().rstrip()
+        if not tail.endswith(b"]"):
+            raise ValueError(f"{self.path} is not a complete JSON array")
+        return start + len(tail[:-1].rstrip())
+
+    def write(self, messages):
+        if self.known_ids is None:
+            self.known_ids = self._read_ids()
+
+        new = []
+        for msg in messages:
+            if msg["message_id"] not in self.known_ids:
+                self.known_ids.add(msg["message_id"])
+                new.append(msg)
+        if not new:
+            return
+
+        # The items of a json.dump(indent=4) array, without its brackets
+        items = json.dumps(new, ensure_ascii=False, indent=4)[1:-1].rstrip()
+
+        if len(self.known_ids) == len(new):
+            # New (or empty) file
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(f"[{items}\n]")
+            os.replace(tmp_path, self.path)
+            return
+
+        with open(self.path, "r+b") as f:
+            f.seek(self._end_of_items(f))
+            f.write(f",{items}\n]".encode("utf-8"))
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def open_writer(output_format, json_dir, channel_name):
+    """
+    Returns the message writer for the configured output format.
+    """
+    writers = {
+        "ndjson": NdjsonWriter,
+        "parquet": ParquetWriter,
+        "json": JsonArrayWriter,
+    }
+    if output_format not in writers:
+        raise ValueError(
+            f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}"
+        )
+    return writers[output_format](json_dir, channel_name)
@@ -8,6 +8,19 @@ class Config:
     # Telegram
     TG_API_ID = os.getenv("TG_API_ID")
     TG_API_HASH = os.getenv("TG_API_HASH")
+    TELEGRAM_CHANNELS = os.getenv(
+        "TELEGRAM_CHANNELS", "@lobelia4cosmetics,@tikvahpharma,@CheMed123"
+    ).split(",")
+
+    # Scraper
+    SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "3"))  # Channels at once
+    SCRAPER_RATE = float(os.getenv("SCRAPER_RATE", "5"))  # API requests per second
+    SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "10"))
+    SCRAPER_DOWNLOAD_WORKERS = int(os.getenv("SCRAPER_DOWNLOAD_WORKERS", "4"))
+    SCRAPER_DOWNLOAD_QUEUE = int(os.getenv("SCRAPER_DOWNLOAD_QUEUE", "100"))
+    # ndjson (default), parquet, or json (legacy pretty-printed arrays)
+    SCRAPER_OUTPUT_FORMAT = os.getenv("SCRAPER_OUTPUT_FORMAT", "ndjson")
+    SCRAPER_CHECKPOINT_DIR = os.getenv("SCRAPER_CHECKPOINT_DIR", "data/raw/checkpoints")
 
     # Database
     DB_USER = os.getenv("POSTGRES_USER", "user")
@@ -16,9 +29,83 @@ class Config:
     DB_PORT = os.getenv("POSTGRES_PORT", "5432")
     DB_NAME = os.getenv("POSTGRES_DB", "telehealth")
 
+    # Loader
+    LOADER_CHUNK_SIZE = int(os.getenv("LOADER_CHUNK_SIZE", "10000"))
+    LOADER_QUARANTINE_PATH = os.getenv(
+        "LOADER_QUARANTINE_PATH", "data/raw/quarantine/telegram_messages.ndjson"
+    )
+
+    # Enrichment (YOLO)
+    YOLO_MODEL = os.getenv("YOLO_MODEL", "yolov8n.pt")
+    # torch (ultralytics), onnx or onnx-int8 (ONNX Runtime on CPU)
+    YOLO_BACKEND = os.getenv("YOLO_BACKEND", "torch")
+    # mmap + reduced-scale JPEG decoding (and hashing) into pooled buffers. Off by default:
+    # detections can differ slightly from full-resolution decoding (see benchmarks/image_decode.py)
+    YOLO_FAST_DECODE = os.getenv("YOLO_FAST_DECODE", "false").lower() in ("1", "true", "yes")
+    # Bump to force re-enrichment of every image. The backend and decode mode are part of it,
+    # so switching either re-enriches
+    YOLO_MODEL_VERSION = os.getenv(
+        "YOLO_MODEL_VERSION",
+        (YOLO_MODEL if YOLO_BACKEND == "torch" else f"{YOLO_MODEL}+{YOLO_BACKEND}")
+        + ("+fastdecode" if YOLO_FAST_DECODE else ""),
+    )
+    YOLO_MANIFEST_PATH = os.getenv(
+        "YOLO_MANIFEST_PATH", "data/processed/detection_manifest.sqlite"
+    )
+    YOLO_IMAGE_SIZE = int(os.getenv("YOLO_IMAGE_SIZE", "640"))
+    YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "16"))
+    YOLO_WORKERS = int(os.getenv("YOLO_WORKERS", "1"))  # Inference processes
+    YOLO_DECODE_THREADS = int(os.getenv("YOLO_DECODE_THREADS", "4"))  # Per process
+    # Images whose dHash is within this many bits of an enriched image reuse its detection
+    # (-1 disables deduplication)
+    YOLO_DEDUP_DISTANCE = int(os.getenv("YOLO_DEDUP_DISTANCE", "4"))
+    # Model server (python -m src serve-model): loads the model once and micro-batches
+    # concurrent requests. Enrichment and /api/classify use it when YOLO_SERVER_URL is set
+    # (http://127.0.0.1:8500, or unix:///path/to.sock); empty runs the model in-process.
+    YOLO_SERVER_URL = os.getenv("YOLO_SERVER_URL", "")
+    YOLO_SERVER_HOST = os.getenv("YOLO_SERVER_HOST", "127.0.0.1")
+    YOLO_SERVER_PORT = int(os.getenv("YOLO_SERVER_PORT", "8500"))
+    YOLO_SERVER_MAX_BATCH = int(os.getenv("YOLO_SERVER_MAX_BATCH", "16"))
+    # How long a batch waits for more images after its first one arrived
+    YOLO_SERVER_MAX_WAIT_MS = float(os.getenv("YOLO_SERVER_MAX_WAIT_MS", "5"))
+    YOLO_SERVER_MAX_QUEUE = int(os.getenv("YOLO_SERVER_MAX_QUEUE", "1024"))  # Images
+    YOLO_SERVER_IMAGE_ROOT = os.getenv("YOLO_SERVER_IMAGE_ROOT", "data/raw/images")
+    YOLO_SERVER_CONCURRENCY = int(os.getenv("YOLO_SERVER_CONCURRENCY", "4"))  # Enrichment requests in flight
+    YOLO_SERVER_TIMEOUT = float(os.getenv("YOLO_SERVER_TIMEOUT", "60"))  # Seconds
+
+    # Instrumentation: batch stages write a run summary JSON here
+    METRICS_SUMMARY_DIR = os.getenv("METRICS_SUMMARY_DIR", "logs/run_summaries")
+
+    # Orchestration
+    # First daily partition (YYYY-MM-DD) of the Dagster assets
+    PIPELINE_START_DATE = os.getenv("PIPELINE_START_DATE", "2026-01-01")
+
+    # API
+    # Response cache: invalidated per pipeline run; the TTL is only a safety net
+    API_CACHE_TTL_SECONDS = int(os.getenv("API_CACHE_TTL_SECONDS", "86400"))
+    API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "512"))
+    API_CACHE_MAX_BYTES = int(os.getenv("API_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    API_CACHE_DIR = os.getenv("API_CACHE_DIR", "")  # Empty disables the disk backend
+    API_RUN_REFRESH_SECONDS = int(os.getenv("API_RUN_REFRESH_SECONDS", "30"))
+    API_DB_POOL_SIZE = int(os.getenv("API_DB_POOL_SIZE", "10"))
+    API_DB_MAX_OVERFLOW = int(os.getenv("API_DB_MAX_OVERFLOW", "20"))
+    API_DB_POOL_TIMEOUT = int(os.getenv("API_DB_POOL_TIMEOUT", "10"))  # Seconds
+    API_DB_STATEMENT_TIMEOUT_MS = int(os.getenv("API_DB_STATEMENT_TIMEOUT_MS", "5000"))
+    API_DB_PREPARED_STATEMENT_CACHE = int(
+        os.getenv("API_DB_PREPARED_STATEMENT_CACHE", "100")
+    )
+    # Bulk exports: rows per keyset page (one short query each) and per streamed chunk
+    API_EXPORT_PAGE_ROWS = int(os.getenv("API_EXPORT_PAGE_ROWS", "10000"))
+    API_EXPORT_FETCH_ROWS = int(os.getenv("API_EXPORT_FETCH_ROWS", "1000"))
+    API_CLASSIFY_MAX_BYTES = int(os.getenv("API_CLASSIFY_MAX_BYTES", str(10 * 1024 * 1024)))
+
     @property
     def DB_CONNECTION_STR(self):
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def ASYNC_DB_CONNECTION_STR(self):
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+
 
 settings = Config()
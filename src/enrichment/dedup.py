@@ -0,0 +1,97 @@
+# dHash compares horizontally adjacent pixels of a (HASH_SIZE + 1) x HASH_SIZE thumbnail
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+# Reduced decodes keep at least this many pixels on the shorter side for the thumbnail
+REDUCED_MIN_SIZE = HASH_SIZE * 8
+
+# The hash is split into this many bands for lookups (see PerceptualIndex)
+BANDS = 8
+BAND_BITS = HASH_BITS // BANDS
+
+
+def dhash(image_path, reduced=False):
+    """
+    Returns the 64-bit difference hash of an image as an int.
+    Re-encoded, resized or lightly edited copies of a photo hash within a few bits of each other.
+    With reduced, large JPEGs are decoded at a fraction of their resolution (still far above
+    the thumbnail's), which can shift a hash by a bit or so near a threshold.
+    """
+    import cv2
+
+    if reduced:
+        from src.enrichment import image_io
+
+        image = image_io.read_gray(image_path, REDUCED_MIN_SIZE)
+    else:
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise ValueError(f"Could not decode image {image_path}")
+
+    thumbnail = cv2.resize(image, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).flatten()
+
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def to_hex(value):
+    return f"{value:016x}"
+
+
+class PerceptualIndex:
+    """
+    Near-duplicate lookup over dHashes: returns the payload of any stored hash within
+    `max_distance` bits. Hashes are bucketed by each of their BANDS bands; two hashes that
+    differ in at most BANDS - 1 bits share at least one band exactly, so only bucket-mates
+    need a full Hamming comparison. Larger distances fall back to a linear scan.
+    """
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        self.entries = []
+        self.buckets = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _bands(value):
+        mask = (1 << BAND_BITS) - 1
+        return [(value >> (band * BAND_BITS)) & mask for band in range(BANDS)]
+
+    def add(self, value, payload):
+        position = len(self.entries)
+        self.entries.append((value, payload))
+        for bucket, band in zip(self.buckets, self._bands(value)):
+            bucket.setdefault(band, []).append(position)
+
+    def find(self, value):
+        """
+        Returns the payload of the closest stored hash within max_distance, or None.
+        """
+        if self.max_distance >= BANDS:
+            candidates = range(len(self.entries))
+        else:
+            candidates = {
+                position
+                for bucket, band in zip(self.buckets, self._bands(value))
+                for position in bucket.get(band, ())
+            }
+
+        best = None
+        best_distance = self.max_distance + 1
+        for position in candidates:
+            stored, payload = self.entries[position]
+            distance = hamming(stored, value)
+            if distance < best_distance:
+                best, best_distance = payload, distance
+                if distance == 0:
+                    break
+        return best
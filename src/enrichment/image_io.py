@@ -0,0 +1,201 @@
+import mmap
+import queue
+
+# Frame header (SOFn) markers, which carry the image size; C4, C8 and CC are not frames
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# libjpeg can decode straight to 1/2, 1/4 or 1/8 scale (DCT scaling), skipping most of the work
+REDUCTION_FACTORS = (8, 4, 2)
+
+
+def jpeg_size(data):
+    """
+    Returns (width, height) from a JPEG's frame header without decoding it,
+    or None if data (bytes, mmap) is not a JPEG.
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    position = 2
+    while position + 9 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:  # Fill byte
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # Markers without a length
+            position += 2
+            continue
+        if marker == 0xDA:  # Scan data before any frame header
+            return None
+        if marker in SOF_MARKERS:
+            height = int.from_bytes(data[position + 5 : position + 7], "big")
+            width = int.from_bytes(data[position + 7 : position + 9], "big")
+            return (width, height) if width and height else None
+        position += 2 + int.from_bytes(data[position + 2 : position + 4], "big")
+    return None
+
+
+def target_size(width, height, imgsz):
+    """
+    (width, height) after fitting the longest side to imgsz; unchanged if it already fits.
+    """
+    scale = imgsz / max(width, height)
+    if scale >= 1:
+        return width, height
+    return round(width * scale), round(height * scale)
+
+
+def reduction_factor(width, height, imgsz):
+    """
+    Largest DCT scale-down that still leaves the longest side at least imgsz pixels,
+    so the final resize only ever shrinks (as it does after a full decode).
+    """
+    for factor in REDUCTION_FACTORS:
+        if max(width, height) / factor >= imgsz:
+            return factor
+    return 1
+
+
+class BufferPool:
+    """
+    Preallocated imgsz x imgsz x 3 uint8 buffers for decoded images, reused across batches
+    instead of allocating (and page-faulting) a fresh array per image. acquire() never
+    blocks: when every buffer is in use it allocates one, and release() keeps at most
+    `size` buffers.
+    """
+
+    def __init__(self, size, imgsz):
+        import numpy as np
+
+        self.shape = (imgsz, imgsz, 3)
+        self._free = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._free.put_nowait(np.empty(self.shape, dtype=np.uint8))
+
+    def acquire(self):
+        import numpy as np
+
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            return np.empty(self.shape, dtype=np.uint8)
+
+    def release(self, image):
+        """
+        Returns the buffer behind a decoded image (a view into it) to the pool.
+        """
+        buffer = image.base if image.base is not None else image
+        if buffer.shape != self.shape:
+            return
+        try:
+            self._free.put_nowait(buffer)
+        except queue.Full:
+            pass
+
+
+def _fit(image, width, height, buffers=None):
+    """
+    Resizes a decoded image to (width, height) with INTER_AREA, into a pooled buffer if given.
+    """
+    import cv2
+
+    if buffers is None:
+        if image.shape[1] == width and image.shape[0] == height:
+            return image
+        return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+    out = buffers.acquire()[:height, :width]
+    if image.shape[1] == width and image.shape[0] == height:
+        out[...] = image
+        return out
+    return cv2.resize(image, (width, height), dst=out, interpolation=cv2.INTER_AREA)
+
+
+def decode(data, imgsz, buffers=None):
+    """
+    Decodes encoded image bytes (bytes, mmap) to BGR, sized like a full decode followed by
+    fitting the longest side to imgsz. Large JPEGs are decoded at a reduced scale first,
+    which cuts decode time and the decoded array's memory by up to factor**2.
+    Raises ValueError if the data cannot be decoded.
+    """
+    import cv2
+    import numpy as np
+
+    flags = cv2.IMREAD_COLOR
+    size = jpeg_size(data)
+    if size:
+        factor = reduction_factor(*size, imgsz)
+        if factor > 1:
+            flags = getattr(cv2, f"IMREAD_REDUCED_COLOR_{factor}")
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError("Could not decode image data")
+
+    if size:
+        width, height = target_size(*size, imgsz)
+        # EXIF rotation swaps the decoded axes relative to the frame header
+        if (image.shape[0] > image.shape[1]) != (height > width):
+            width, height = height, width
+    else:
+        width, height = target_size(image.shape[1], image.shape[0], imgsz)
+    return _fit(image, width, height, buffers)
+
+
+def read(path, imgsz, buffers=None):
+    """
+    Decodes an image file through a read-only memory map (no copy into a bytes object);
+    see decode.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            raise ValueError(f"Could not decode image {path}")
+        with mapped:
+            try:
+                return decode(mapped, imgsz, buffers)
+            except ValueError:
+                raise ValueError(f"Could not decode image {path}")
+
+
+def read_gray(path, min_size):
+    """
+    Decodes an image file to grayscale through a memory map. JPEGs are decoded at the
+    largest DCT scale-down that keeps their shorter side at least min_size pixels.
+    Raises ValueError if the file cannot be decoded.
+    """
+    import cv2
+    import numpy as np
+
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            raise ValueError(f"Could not decode image {path}")
+        with mapped:
+            flags = cv2.IMREAD_GRAYSCALE
+            size = jpeg_size(mapped)
+            if size:
+                shorter = min(size)
+                factor = reduction_factor(shorter, shorter, min_size)
+                if factor > 1:
+                    flags = getattr(cv2, f"IMREAD_REDUCED_GRAYSCALE_{factor}")
+            image = cv2.imdecode(np.frombuffer(mapped, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError(f"Could not decode image {path}")
+    return image
+
+
+def read_full(path, imgsz):
+    """
+    The reference path: full-resolution cv2.imread, then fit the longest side to imgsz.
+    """
+    import cv2
+
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError(f"Could not decode image {path}")
+    return _fit(image, *target_size(image.shape[1], image.shape[0], imgsz))
@@ -0,0 +1,190 @@
+import os
+import hashlib
+import sqlite3
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+DETECTION_COLUMNS = ["detected_class", "confidence", "image_category", "all_classes"]
+
+
+def file_sha1(path, chunk_size=1024 * 1024):
+    """
+    Returns the SHA-1 hex digest of a file's contents, read in chunks.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DetectionManifest:
+    """
+    Persistent record of enriched images, keyed by (channel_name, message_id).
+    Stores the content hash and model version each image was processed with,
+    plus the detection itself so the full result set can be exported without re-running YOLO.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # Generous lock timeout: concurrent enrichment runs share the file
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS image_manifest (
+                channel_name TEXT NOT NULL,
+                message_id INTEGER NOT NULL,
+                image_path TEXT,
+                file_size INTEGER,
+                file_mtime REAL,
+                content_hash TEXT,
+                model_version TEXT,
+                detected_class TEXT,
+                confidence REAL,
+                image_category TEXT,
+                all_classes TEXT,
+                detected_at TEXT,
+                dhash TEXT,
+                PRIMARY KEY (channel_name, message_id)
+            )
+        """)
+        # Manifests created before perceptual deduplication lack the hash column
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(image_manifest)")}
+        if "dhash" not in columns:
+            self.conn.execute("ALTER TABLE image_manifest ADD COLUMN dhash TEXT")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def _lookup(self):
+        rows = self.conn.execute(
+            "SELECT channel_name, message_id, file_size, file_mtime, content_hash, model_version "
+            "FROM image_manifest"
+        )
+        return {(row[0], row[1]): row[2:] for row in rows}
+
+    def find_pending(self, images, model_version):
+        """
+        Returns the images that are new, changed on disk, or were processed by another model version.
+        `images` is a list of dicts with image_path, channel_name and message_id.
+        Each returned dict gains file_size, file_mtime and content_hash.
+        Files whose size and mtime are unchanged are not re-hashed.
+        """
+        known = self._lookup()
+        pending = []
+        touched = []
+
+        for image in images:
+            key = (image["channel_name"], image["message_id"])
+            try:
+                stat = os.stat(image["image_path"])
+            except OSError as e:
+                logger.error(f"Cannot stat {image['image_path']}: {e}")
+                continue
+
+            entry = known.get(key)
+            if entry is not None and entry[3] == model_version:
+                size, mtime, content_hash = entry[0], entry[1], entry[2]
+                if size == stat.st_size and mtime == stat.st_mtime:
+                    continue
+
+                # Touched on disk: only re-run if the bytes actually changed
+                new_hash = file_sha1(image["image_path"])
+                if new_hash == content_hash:
+                    touched.append((stat.st_size, stat.st_mtime, *key))
+                    continue
+            else:
+                new_hash = file_sha1(image["image_path"])
+
+            pending.append(
+                {
+                    **image,
+                    "file_size": stat.st_size,
+                    "file_mtime": stat.st_mtime,
+                    "content_hash": new_hash,
+                }
+            )
+
+        if touched:
+            self.conn.executemany(
+                "UPDATE image_manifest SET file_size = ?, file_mtime = ? "
+                "WHERE channel_name = ? AND message_id = ?",
+                touched,
+            )
+            self.conn.commit()
+
+        return pending
+
+    def record(self, records, model_version):
+        """
+        Upserts processed images. Call only after the detections are safely stored downstream.
+        """
+        detected_at = datetime.now(timezone.utc).isoformat()
+        self.conn.executemany(
+            """
+            INSERT INTO image_manifest (
+                channel_name, message_id, image_path, file_size, file_mtime, content_hash,
+                model_version, detected_class, confidence, image_category, all_classes, detected_at,
+                dhash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (channel_name, message_id) DO UPDATE SET
+                image_path = excluded.image_path,
+                file_size = excluded.file_size,
+                file_mtime = excluded.file_mtime,
+                content_hash = excluded.content_hash,
+                model_version = excluded.model_version,
+                detected_class = excluded.detected_class,
+                confidence = excluded.confidence,
+                image_category = excluded.image_category,
+                all_classes = excluded.all_classes,
+                detected_at = excluded.detected_at,
+                dhash = excluded.dhash
+            """,
+            [
+                (
+                    r["channel_name"],
+                    r["message_id"],
+                    r["image_path"],
+                    r["file_size"],
+                    r["file_mtime"],
+                    r["content_hash"],
+                    model_version,
+                    r["detected_class"],
+                    r["confidence"],
+                    r["image_category"],
+                    r["all_classes"],
+                    detected_at,
+                    r.get("dhash"),
+                )
+                for r in records
+            ],
+        )
+        self.conn.commit()
+
+    def hash_index(self, model_version):
+        """
+        Returns (dhash hex, detection dict) for every image enriched by model_version,
+        the reusable detections for near-duplicate images.
+        """
+        rows = self.conn.execute(
+            "SELECT dhash, " + ", ".join(DETECTION_COLUMNS) + " FROM image_manifest "
+            "WHERE model_version = ? AND dhash IS NOT NULL",
+            (model_version,),
+        )
+        return [(row[0], dict(zip(DETECTION_COLUMNS, row[1:]))) for row in rows]
+
+    def export_detections(self):
+        """
+        Returns every stored detection as a DataFrame (same columns as yolo_results.csv).
+        """
+        import pandas as pd
+
+        return pd.read_sql_query(
+            "SELECT message_id, channel_name, "
+            + ", ".join(DETECTION_COLUMNS)
+            + ", image_path FROM image_manifest ORDER BY channel_name, message_id",
+            self.conn,
+        )
@@ -0,0 +1,64 @@
+import os
+
+import httpx
+
+from src.config import settings
+
+# Host name used in request URLs when the server listens on a Unix socket
+UDS_BASE_URL = "http://model-server"
+
+
+def _client_args(url, transport_cls):
+    url = url or settings.YOLO_SERVER_URL
+    if not url:
+        raise RuntimeError("YOLO_SERVER_URL is not set")
+    if url.startswith("unix://"):
+        return {"transport": transport_cls(uds=url[len("unix://"):]), "base_url": UDS_BASE_URL}
+    return {"base_url": url}
+
+
+def connect(url=None, timeout=None):
+    """
+    Returns an httpx.Client for the model server at url (default YOLO_SERVER_URL):
+    http://host:port or unix:///path/to.sock.
+    """
+    return httpx.Client(
+        timeout=timeout or settings.YOLO_SERVER_TIMEOUT, **_client_args(url, httpx.HTTPTransport)
+    )
+
+
+def connect_async(url=None, timeout=None):
+    """
+    Returns an httpx.AsyncClient for the model server (see connect).
+    """
+    return httpx.AsyncClient(
+        timeout=timeout or settings.YOLO_SERVER_TIMEOUT,
+        **_client_args(url, httpx.AsyncHTTPTransport),
+    )
+
+
+def check_server(client, model_version):
+    """
+    Fails unless the server is up and runs model_version: detections are stored (and
+    cached in the manifest) per model version, so they must not come from another model.
+    """
+    health = client.get("/health")
+    health.raise_for_status()
+    served = health.json()["model_version"]
+    if served != model_version:
+        raise RuntimeError(
+            f"Model server runs {served}, but this run enriches with {model_version}"
+        )
+    return health.json()
+
+
+def classify_paths(client, paths):
+    """
+    Classifies image files on the server's disk; returns one detection (or None) per path.
+    Paths are sent absolute, since the server does not share this process's working directory.
+    """
+    response = client.post(
+        "/classify/paths", json={"paths": [os.path.abspath(path) for path in paths]}
+    )
+    response.raise_for_status()
+    return response.json()["detections"]
@@ -0,0 +1,275 @@
+"""
+Long-lived YOLO inference service: loads the model once and coalesces concurrent requests
+into model batches. Start it with `python -m src serve-model`; enrichment and the API's
+/api/classify reach it through src.enrichment.model_client.
+"""
+import os
+import time
+import asyncio
+import logging
+import contextlib
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from src.config import settings
+from src.enrichment import yolo_detect
+from src.instrumentation import REGISTRY, counter, histogram
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZES = histogram(
+    "model_server_batch_size", "Images per model call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+QUEUE_SECONDS = histogram(
+    "model_server_queue_seconds", "Time an image waits before its batch starts"
+)
+IMAGES = counter("model_server_images_total", "Images handled by the model server", ["status"])
+
+
+class ServerOverloaded(Exception):
+    pass
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent classify() calls into model batches. A batch starts once
+    max_batch images are queued, or max_wait_ms after its first image arrived;
+    max_wait_ms=0 only takes what is already queued. Images are decoded on a thread pool,
+    and inference runs on one thread, so the model is never called concurrently.
+    """
+
+    def __init__(self, model, max_batch, max_wait_ms, max_queue, decode_threads, imgsz):
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.imgsz = imgsz
+        self.batches = 0
+        self.images = 0
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._decode_pool = ThreadPoolExecutor(max_workers=decode_threads)
+        self._model_pool = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._decode_pool.shutdown(wait=False)
+        self._model_pool.shutdown(wait=True)
+
+    async def classify(self, source):
+        """
+        Classifies an image file path or encoded image bytes; returns the detection
+        (classify_detections fields). Raises ValueError if the image cannot be decoded
+        and ServerOverloaded if the queue is full.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((source, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            IMAGES.inc(status="rejected")
+            raise ServerOverloaded(f"Model server queue is full ({self._queue.maxsize} images)")
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._run_batch(batch)
+            except Exception as e:
+                # A failed batch fails its requests, never the server
+                logger.error(f"Batch of {len(batch)} images failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"Inference failed: {e}"))
+
+    def _decode(self, source):
+        try:
+            if isinstance(source, str):
+                return yolo_detect.load_image(source, self.imgsz)
+            return yolo_detect.decode_image(source, self.imgsz)
+        except Exception as e:
+            raise ValueError(str(e)) from e
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        decoded = await asyncio.gather(
+            *(loop.run_in_executor(self._decode_pool, self._decode, source) for source, _, _ in batch),
+            return_exceptions=True,
+        )
+
+        ready = []
+        for (_, future, queued_at), image in zip(batch, decoded):
+            QUEUE_SECONDS.observe(started - queued_at)
+            if isinstance(image, Exception):
+                IMAGES.inc(status="invalid")
+                if not future.done():
+                    future.set_exception(image)
+            else:
+                ready.append((future, image))
+        if not ready:
+            return
+
+        BATCH_SIZES.observe(len(ready))
+        detections = await loop.run_in_executor(
+            self._model_pool, yolo_detect.detect_batch, [image for _, image in ready], self.model
+        )
+        self.batches += 1
+        self.images += len(ready)
+        IMAGES.inc(len(ready), status="ok")
+        for (future, _), detection in zip(ready, detections):
+            # The client may have given up (cancelled) while the batch ran
+            if not future.done():
+                future.set_result(detection)
+
+
+class PathsRequest(BaseModel):
+    paths: List[str]
+
+
+def create_app(model=None, max_batch=None, max_wait_ms=None):
+    """
+    Returns the model server app. The model (default: YOLO_BACKEND) is loaded at startup,
+    unless an already loaded one is passed in.
+    """
+    max_batch = max_batch or settings.YOLO_SERVER_MAX_BATCH
+    max_wait_ms = settings.YOLO_SERVER_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+    image_root = os.path.realpath(settings.YOLO_SERVER_IMAGE_ROOT)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        loaded = model
+        if loaded is None:
+            from src.enrichment.yolo_detector import load_backend
+
+            logger.info(f"Loading {yolo_detect.MODEL_PATH} ({yolo_detect.BACKEND})...")
+            loaded = load_backend(yolo_detect.BACKEND, yolo_detect.MODEL_PATH, yolo_detect.IMAGE_SIZE)
+
+        app.state.batcher = MicroBatcher(
+            loaded,
+            max_batch,
+            max_wait_ms,
+            settings.YOLO_SERVER_MAX_QUEUE,
+            settings.YOLO_DECODE_THREADS,
+            yolo_detect.IMAGE_SIZE,
+        )
+        app.state.batcher.start()
+        logger.info(f"Model server ready (max_batch={max_batch}, max_wait_ms={max_wait_ms}).")
+        yield
+        await app.state.batcher.close()
+
+    app = FastAPI(title="TeleHealth YOLO Model Server", lifespan=lifespan)
+
+    async def classify(request, source):
+        try:
+            return await request.app.state.batcher.classify(source)
+        except ServerOverloaded as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok",
+            "backend": yolo_detect.BACKEND,
+            "model_version": yolo_detect.MODEL_VERSION,
+            "max_batch": max_batch,
+            "max_wait_ms": max_wait_ms,
+        }
+
+    @app.post("/classify")
+    async def classify_bytes(request: Request):
+        """
+        Classifies the encoded image in the request body.
+        """
+        data = await request.body()
+        if not data:
+            raise HTTPException(status_code=400, detail="Empty request body")
+        detection = await classify(request, data)
+        return {**detection, "model_version": yolo_detect.MODEL_VERSION}
+
+    @app.post("/classify/paths")
+    async def classify_paths(request: Request, body: PathsRequest):
+        """
+        Classifies image files under YOLO_SERVER_IMAGE_ROOT (the server shares the host's
+        disk). Paths must be absolute: relative ones would resolve against the server's
+        working directory, not the caller's. Returns one detection per path, null for images
+        that could not be decoded.
+        """
+        for path in body.paths:
+            if not os.path.isabs(path):
+                raise HTTPException(status_code=400, detail=f"{path} is not an absolute path")
+            if os.path.commonpath([image_root, os.path.realpath(path)]) != image_root:
+                raise HTTPException(status_code=403, detail=f"{path} is outside {image_root}")
+
+        results = await asyncio.gather(
+            *(request.app.state.batcher.classify(path) for path in body.paths),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, ServerOverloaded):
+                raise HTTPException(status_code=503, detail=str(result))
+            if isinstance(result, RuntimeError):
+                raise HTTPException(status_code=500, detail=str(result))
+        return {
+            "model_version": yolo_detect.MODEL_VERSION,
+            "detections": [None if isinstance(result, Exception) else result for result in results],
+        }
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return PlainTextResponse(
+            REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+    return app
+
+
+def serve(host=None, port=None, uds=None, max_batch=None, max_wait_ms=None):
+    """
+    Runs the model server with uvicorn on host:port, or on a Unix socket when uds is set.
+    """
+    import uvicorn
+
+    app = create_app(max_batch=max_batch, max_wait_ms=max_wait_ms)
+    if uds:
+        uvicorn.run(app, uds=uds, log_config=None)
+    else:
+        uvicorn.run(
+            app,
+            host=host or settings.YOLO_SERVER_HOST,
+            port=port or settings.YOLO_SERVER_PORT,
+            log_config=None,
+        )
@@ -1,149 +1,692 @@
 import os
-import pandas as pd
-from ultralytics import YOLO
 import logging
-from sqlalchemy import create_engine, text
 import glob
+import time
+import functools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 from src.config import settings
+from src.enrichment.manifest import DetectionManifest, DETECTION_COLUMNS
+from src.enrichment.dedup import PerceptualIndex, dhash, to_hex
+from src.enrichment import image_io
+from src.instrumentation import REGISTRY, counter, histogram, write_run_summary
+from src.logging_setup import configure_logging
 
-# Configure logging
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("logs/yolo_detect.log"), logging.StreamHandler()],
-)
 logger = logging.getLogger(__name__)
+LOG_FILE = "logs/yolo_detect.log"
 
 # Database Credentials
 DB_CONNECTION_STR = settings.DB_CONNECTION_STR
 
+# Inference settings
+MODEL_PATH = settings.YOLO_MODEL
+BACKEND = settings.YOLO_BACKEND
+IMAGE_SIZE = settings.YOLO_IMAGE_SIZE
+MODEL_VERSION = settings.YOLO_MODEL_VERSION
+MANIFEST_PATH = settings.YOLO_MANIFEST_PATH
+DEDUP_DISTANCE = settings.YOLO_DEDUP_DISTANCE
+FAST_DECODE = settings.YOLO_FAST_DECODE
+
+# Number of batches each worker decodes ahead of the model
+PREFETCH_BATCHES = 2
+
+IMAGE_SECONDS = histogram(
+    "yolo_image_seconds", "Per-image time in each enrichment phase", ["phase"]
+)
+IMAGES_PROCESSED = counter("yolo_images_total", "Images run through the model")
+DB_WRITE_SECONDS = histogram("yolo_db_write_seconds", "Time to upsert a set of detections")
+DEDUP_LOOKUPS = counter(
+    "yolo_dedup_lookups_total", "Perceptual-hash lookups before inference", ["result"]
+)
+
+
+def parse_image_path(img_path):
+    """
+    Extracts (channel_name, message_id) from an image path.
+    Expected path: data/raw/images/{channel}/{message_id}.jpg
+    """
+    parts = img_path.replace("\\", "/").split("/")
+    message_id = int(parts[-1].replace(".jpg", ""))
+    channel_name = parts[-2]
+    return channel_name, message_id
+
+
+def load_image(image_path, imgsz=IMAGE_SIZE, buffers=None):
+    """
+    Decodes an image file (BGR), downsized so its longest side fits the model input.
+    YOLO letterboxes to `imgsz` anyway, so shrinking here only saves work in the model process.
+    With YOLO_FAST_DECODE the file is memory-mapped and large JPEGs are decoded at reduced
+    scale; `buffers` (an image_io.BufferPool) then holds the result.
+    """
+    with IMAGE_SECONDS.time(phase="decode"):
+        if FAST_DECODE:
+            return image_io.read(image_path, imgsz, buffers)
+        return image_io.read_full(image_path, imgsz)
+
+
+def decode_image(data, imgsz=IMAGE_SIZE):
+    """
+    Decodes encoded image bytes (e.g. an uploaded JPEG) like load_image.
+    """
+    with IMAGE_SECONDS.time(phase="decode"):
+        return image_io.decode(data, imgsz)
+
+
+def classify_detections(detected_classes, confidence_scores):
+    """
+    Classifies an image from its detections (class names, highest confidence first)
+    based on rubric rules. Every backend goes through here, so categories stay identical.
+    """
+    # Taking the highest confidence detection for simplicity in main reporting
+    # or joining all detections. The requirements imply a single classification per image.
+
+    # Classification Logic
+    has_person = "person" in detected_classes
+    has_bottle = "bottle" in detected_classes
+    has_cup = "cup" in detected_classes
+
+    image_category = "other"
+    if has_person and has_bottle:
+        image_category = "promotional"
+    elif (has_bottle or has_cup) and not has_person:
+        image_category = "product_display"
+
+    # Join classes and mean confidence for record
+    primary_class = detected_classes[0] if detected_classes else "none"
+    avg_confidence = (
+        sum(confidence_scores) / len(confidence_scores)
+        if confidence_scores
+        else 0.0
+    )
+
+    return {
+        "detected_class": primary_class,
+        "confidence": avg_confidence,
+        "image_category": image_category,
+        "all_classes": ", ".join(detected_classes),
+    }
+
 
 def detect_and_classify(image_path, model):
     """
-    Runs YOLO detection and classifies the image based on rubric rules.
+    Runs detection with an inference backend and classifies the image based on rubric rules.
     """
     try:
-        results = model(image_path)
-        result = results[0]
-
-        detected_classes = [result.names[int(cls)] for cls in result.boxes.cls]
-        confidence_scores = [float(conf) for conf in result.boxes.conf]
-
-        # Taking the highest confidence detection for simplicity in main reporting
-        # or joining all detections. The requirements imply a single classification per image.
-
-        # Classification Logic
-        has_person = "person" in detected_classes
-        has_bottle = "bottle" in detected_classes
-        has_cup = "cup" in detected_classes
-
-        image_category = "other"
-        if has_person and has_bottle:
-            image_category = "promotional"
-        elif (has_bottle or has_cup) and not has_person:
-            image_category = "product_display"
-
-        # Join classes and mean confidence for record
-        primary_class = detected_classes[0] if detected_classes else "none"
-        avg_confidence = (
-            sum(confidence_scores) / len(confidence_scores)
-            if confidence_scores
-            else 0.0
-        )
-
-        return {
-            "detected_class": primary_class,
-            "confidence": avg_confidence,
-            "image_category": image_category,
-            "all_classes": ", ".join(detected_classes),
-        }
+        detected_classes, confidence_scores = model.detect([load_image(image_path)])[0]
+        return classify_detections(detected_classes, confidence_scores)
 
     except Exception as e:
         logger.error(f"Error processing {image_path}: {e}")
         return None
 
 
-def main():
-    logger.info("Starting AI Enrichment Process...")
+def detect_batch(images, model):
+    """
+    Runs an inference backend on a batch of decoded images and classifies each result.
+    """
+    start = time.perf_counter()
+    results = model.detect(images)
+    per_image = (time.perf_counter() - start) / max(len(images), 1)
 
-    # Load Model (Nano)
-    try:
-        model = YOLO("yolov8n.pt")
-    except Exception as e:
-        logger.error(f"Failed to load YOLO model: {e}")
-        return
+    detections = []
+    for detected_classes, confidence_scores in results:
+        # The backend's own pre- and postprocessing (letterbox, NMS) count as inference
+        IMAGE_SECONDS.observe(per_image, phase="inference")
+        with IMAGE_SECONDS.time(phase="classify"):
+            detections.append(classify_detections(detected_classes, confidence_scores))
+    IMAGES_PROCESSED.inc(len(detections))
+    return detections
 
-    # Find Images
-    image_dir = "data/raw/images"
-    image_paths = glob.glob(os.path.join(image_dir, "**", "*.jpg"), recursive=True)
 
-    if not image_paths:
-        logger.warning("No images found to process.")
-        return
+def iter_decoded_batches(image_paths, batch_size, decode_threads, buffers=None):
+    """
+    Decodes images on a thread pool and yields (path, image) batches in input order.
+    At most PREFETCH_BATCHES batches are decoded ahead, which keeps memory bounded.
+    With `buffers`, images live in pooled buffers the caller releases after each batch.
+    """
+    decode = functools.partial(load_image, buffers=buffers)
+    paths = iter(image_paths)
+    pending = deque()
 
-    results_data = []
+    with ThreadPoolExecutor(max_workers=decode_threads) as pool:
+        for path in paths:
+            pending.append((path, pool.submit(decode, path)))
+            if len(pending) >= batch_size * PREFETCH_BATCHES:
+                break
 
-    for img_path in image_paths:
-        # Extract message_id and channel from path
-        # Expected path: data/raw/images/{channel}/{message_id}.jpg
-        try:
-            parts = img_path.replace("\\", "/").split("/")
-            message_id = parts[-1].replace(".jpg", "")
-            channel_name = parts[-2]
+        batch = []
+        while pending:
+            path, future = pending.popleft()
 
-            detection = detect_and_classify(img_path, model)
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(decode, next_path)))
+
+            try:
+                batch.append((path, future.result()))
+            except Exception as e:
+                logger.error(f"Error decoding {path}: {e}")
+                continue
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+
+def run_worker(image_paths, batch_size, decode_threads, threads_per_worker=None):
+    """
+    Inference worker: loads the model once and runs every batch of its shard.
+    Returns detection records for the shard.
+    """
+    from src.enrichment.yolo_detector import load_backend
 
-            if detection:
-                record = {
+    # threads_per_worker avoids oversubscribing cores when several workers share the box
+    model = load_backend(BACKEND, MODEL_PATH, IMAGE_SIZE, threads_per_worker)
+    records = []
+
+    # Enough buffers for the batch in the model plus the batches decoded ahead
+    buffers = None
+    if FAST_DECODE:
+        buffers = image_io.BufferPool(batch_size * (PREFETCH_BATCHES + 1), IMAGE_SIZE)
+
+    for batch in iter_decoded_batches(image_paths, batch_size, decode_threads, buffers):
+        paths = [path for path, _ in batch]
+        images = [image for _, image in batch]
+
+        try:
+            detections = detect_batch(images, model)
+        except Exception as e:
+            logger.error(f"Inference failed for batch of {len(batch)} images: {e}")
+            continue
+        finally:
+            if buffers is not None:
+                for image in images:
+                    buffers.release(image)
+
+        for img_path, detection in zip(paths, detections):
+            try:
+                channel_name, message_id = parse_image_path(img_path)
+            except Exception as e:
+                logger.error(f"Skipping file due to path error {img_path}: {e}")
+                continue
+
+            records.append(
+                {
                     "message_id": message_id,
                     "channel_name": channel_name,
                     **detection,
                     "image_path": img_path,
                 }
-                results_data.append(record)
+            )
 
-        except Exception as e:
-            logger.error(f"Skipping file due to path error {img_path}: {e}")
+    return records
 
-    # Save to CSV
-    output_dir = "data/processed"
-    os.makedirs(output_dir, exist_ok=True)
-    csv_path = os.path.join(output_dir, "yolo_results.csv")
 
-    df = pd.DataFrame(results_data)
-    if not df.empty:
-        df.to_csv(csv_path, index=False)
-        logger.info(f"Saved {len(df)} detection results to {csv_path}")
+def run_worker_with_metrics(*args):
+    """
+    run_worker for pool processes: also returns the worker's metrics for the parent to merge.
+    """
+    # Spawned workers start with unconfigured logging
+    configure_logging(LOG_FILE, "src.enrichment")
+    return run_worker(*args), REGISTRY.export_state()
 
-        # Load to Postgres
-        try:
-            engine = create_engine(DB_CONNECTION_STR)
 
-            # Create schema 'raw' if needed (though loader likely did it)
-            # We will use 'raw_image_detections' table in 'public' or 'raw' schema?
-            # User said: "Postgres table named raw_image_detections". Usually implies public or raw.
-            # Let's put it in 'raw' to match other raw tables, or just public if unspecified.
-            # Given dbt models usually source from something, and other table is raw.telegram_messages.
-            # I will use 'raw' schema for consistency with the loader 'raw.telegram_messages'.
+def run_inference(image_paths, workers=None, batch_size=None, decode_threads=None):
+    """
+    Shards images across worker processes and runs batched inference.
+    Logs throughput in images/sec so batch size and worker count can be tuned.
+    """
+    workers = max(1, workers or settings.YOLO_WORKERS)
+    batch_size = max(1, batch_size or settings.YOLO_BATCH_SIZE)
+    decode_threads = max(1, decode_threads or settings.YOLO_DECODE_THREADS)
 
-            table_name = "image_detections"
-            schema = "raw"
+    start = time.perf_counter()
+    records = []
 
-            df.to_sql(
-                table_name, engine, schema=schema, if_exists="replace", index=False
+    if workers == 1:
+        records = run_worker(image_paths, batch_size, decode_threads)
+    else:
+        shards = [image_paths[i::workers] for i in range(workers)]
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+        if BACKEND.startswith("onnx") and not MODEL_PATH.endswith(".onnx"):
+            from src.enrichment.yolo_detector import export_onnx
+
+            # Export once here rather than racing to export in every worker
+            export_onnx(MODEL_PATH, IMAGE_SIZE, int8=BACKEND == "onnx-int8")
+
+        # 'spawn' keeps torch state out of the parent and works on every platform
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(
+                    run_worker_with_metrics, shard, batch_size, decode_threads, threads_per_worker
+                )
+                for shard in shards
+                if shard
+            ]
+            for future in futures:
+                shard_records, metrics = future.result()
+                records.extend(shard_records)
+                REGISTRY.merge_state(metrics)
+
+    elapsed = time.perf_counter() - start
+    rate = len(image_paths) / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Inference finished: {len(image_paths)} images in {elapsed:.1f}s "
+        f"({rate:.1f} images/sec, workers={workers}, batch_size={batch_size}, "
+        f"decode_threads={decode_threads})"
+    )
+
+    return records
+
+
+def run_remote_inference(image_paths, batch_size=None, concurrency=None):
+    """
+    Sends image paths to the model server (YOLO_SERVER_URL) in batch_size chunks, with
+    `concurrency` requests in flight so the server can coalesce them into full batches.
+    Returns detection records like run_worker; the model is not loaded in this process.
+    """
+    from src.enrichment import model_client
+
+    batch_size = max(1, batch_size or settings.YOLO_BATCH_SIZE)
+    concurrency = max(1, concurrency or settings.YOLO_SERVER_CONCURRENCY)
+    chunks = [image_paths[i : i + batch_size] for i in range(0, len(image_paths), batch_size)]
+
+    start = time.perf_counter()
+    records = []
+    with model_client.connect() as client:
+        model_client.check_server(client, MODEL_VERSION)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = pool.map(lambda chunk: model_client.classify_paths(client, chunk), chunks)
+            for paths, detections in zip(chunks, results):
+                for img_path, detection in zip(paths, detections):
+                    if detection is None:
+                        logger.error(f"Model server could not decode {img_path}")
+                        continue
+                    channel_name, message_id = parse_image_path(img_path)
+                    records.append(
+                        {
+                            "message_id": message_id,
+                            "channel_name": channel_name,
+                            **{column: detection[column] for column in DETECTION_COLUMNS},
+                            "image_path": img_path,
+                        }
+                    )
+
+    elapsed = time.perf_counter() - start
+    rate = len(image_paths) / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Remote inference finished: {len(image_paths)} images in {elapsed:.1f}s "
+        f"({rate:.1f} images/sec, batch_size={batch_size}, concurrency={concurrency})"
+    )
+    return records
+
+
+def compare_backends(image_paths, candidate, baseline="torch", batch_size=None):
+    """
+    Runs two inference backends on the same decoded images and reports how often their
+    image_category and detected_class agree, plus each backend's images/sec and the speedup.
+    """
+    from src.enrichment.yolo_detector import load_backend
+
+    batch_size = max(1, batch_size or settings.YOLO_BATCH_SIZE)
+    batches = list(iter_decoded_batches(image_paths, batch_size, settings.YOLO_DECODE_THREADS))
+
+    report = {"images": sum(len(batch) for batch in batches), "backends": {}}
+    detections = {}
+    for name in (baseline, candidate):
+        start = time.perf_counter()
+        model = load_backend(name, MODEL_PATH, IMAGE_SIZE)
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        detections[name] = [
+            detection
+            for batch in batches
+            for detection in detect_batch([image for _, image in batch], model)
+        ]
+        seconds = time.perf_counter() - start
+        report["backends"][name] = {
+            "load_seconds": round(load_seconds, 2),
+            "seconds": round(seconds, 2),
+            "images_per_sec": round(report["images"] / seconds, 1) if seconds else 0.0,
+        }
+
+    pairs = list(zip(detections[baseline], detections[candidate]))
+    if pairs:
+        report["category_agreement"] = round(
+            sum(a["image_category"] == b["image_category"] for a, b in pairs) / len(pairs), 4
+        )
+        report["class_agreement"] = round(
+            sum(a["detected_class"] == b["detected_class"] for a, b in pairs) / len(pairs), 4
+        )
+        report["mean_confidence_delta"] = round(
+            sum(abs(a["confidence"] - b["confidence"]) for a, b in pairs) / len(pairs), 4
+        )
+    baseline_seconds = report["backends"][baseline]["seconds"]
+    candidate_seconds = report["backends"][candidate]["seconds"]
+    report["speedup"] = (
+        round(baseline_seconds / candidate_seconds, 2) if candidate_seconds else None
+    )
+    return report
+
+
+def ensure_detections_table(connection):
+    """
+    Creates raw.image_detections keyed by (channel_name, message_id) so results can be upserted.
+    Tables created by the old full-replace load get the missing columns, a BIGINT message_id
+    and a unique index.
+    """
+    from sqlalchemy import text
+
+    connection.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
+    connection.execute(
+        text("""
+            CREATE TABLE IF NOT EXISTS raw.image_detections (
+                message_id BIGINT NOT NULL,
+                channel_name TEXT NOT NULL,
+                detected_class TEXT,
+                confidence DOUBLE PRECISION,
+                image_category TEXT,
+                all_classes TEXT,
+                image_path TEXT,
+                content_hash TEXT,
+                model_version TEXT,
+                detected_at TIMESTAMPTZ DEFAULT now(),
+                PRIMARY KEY (channel_name, message_id)
             )
-            logger.info(f"Loaded data to {schema}.{table_name}")
+        """)
+    )
+    connection.execute(
+        text("""
+            ALTER TABLE raw.image_detections
+                ADD COLUMN IF NOT EXISTS content_hash TEXT,
+                ADD COLUMN IF NOT EXISTS model_version TEXT,
+                ADD COLUMN IF NOT EXISTS detected_at TIMESTAMPTZ DEFAULT now()
+        """)
+    )
+    # The old load stored message_id as text; dbt joins on the typed key
+    connection.execute(
+        text("""
+            DO $$
+            BEGIN
+                IF (
+                    SELECT data_type FROM information_schema.columns
+                    WHERE table_schema = 'raw' AND table_name = 'image_detections'
+                      AND column_name = 'message_id'
+                ) <> 'bigint' THEN
+                    ALTER TABLE raw.image_detections
+                        ALTER COLUMN message_id TYPE BIGINT USING message_id::bigint;
+                END IF;
+            END $$;
+        """)
+    )
+    connection.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS image_detections_channel_message_idx "
+            "ON raw.image_detections (channel_name, message_id)"
+        )
+    )
+
 
+def upsert_detections(records):
+    """
+    Upserts detection records into raw.image_detections on (channel_name, message_id).
+    """
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(DB_CONNECTION_STR)
+    upsert = text("""
+        INSERT INTO raw.image_detections (
+            message_id, channel_name, detected_class, confidence, image_category,
+            all_classes, image_path, content_hash, model_version, detected_at
+        ) VALUES (
+            :message_id, :channel_name, :detected_class, :confidence, :image_category,
+            :all_classes, :image_path, :content_hash, :model_version, now()
+        )
+        ON CONFLICT (channel_name, message_id) DO UPDATE SET
+            detected_class = EXCLUDED.detected_class,
+            confidence = EXCLUDED.confidence,
+            image_category = EXCLUDED.image_category,
+            all_classes = EXCLUDED.all_classes,
+            image_path = EXCLUDED.image_path,
+            content_hash = EXCLUDED.content_hash,
+            model_version = EXCLUDED.model_version,
+            detected_at = EXCLUDED.detected_at
+    """)
+
+    rows = [{**record, "model_version": MODEL_VERSION} for record in records]
+    with DB_WRITE_SECONDS.time(), engine.begin() as connection:
+        ensure_detections_table(connection)
+        connection.execute(upsert, rows)
+
+
+def hash_images(images, threads):
+    """
+    Adds the dHash (hex) of each image on a thread pool; None if the image cannot be decoded.
+    """
+
+    def safe_dhash(path):
+        try:
+            return to_hex(dhash(path, reduced=FAST_DECODE))
         except Exception as e:
-            logger.error(f"Database load failed: {e}")
-    else:
-        logger.warning("No detections to save.")
+            logger.error(f"Could not hash {path}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        paths = [image["image_path"] for image in images]
+        for image, value in zip(images, pool.map(safe_dhash, paths)):
+            image["dhash"] = value
+
+
+def deduplicate(pending, known, max_distance):
+    """
+    Splits hashed pending images into:
+      unique  - images that must go through the model,
+      reused  - records reusing the stored detection of a near-duplicate (from `known`,
+                the manifest's (dhash, detection) pairs for the current model version),
+      copies  - {representative image_path: [images]} near-duplicates of a unique image
+                in this same run, which take its detection once inference is done.
+    """
+    index = PerceptualIndex(max_distance)
+    for value, detection in known:
+        index.add(int(value, 16), {"detection": detection})
+
+    unique, reused, copies = [], [], {}
+    for image in pending:
+        if image["dhash"] is None:
+            unique.append(image)
+            continue
+
+        value = int(image["dhash"], 16)
+        match = index.find(value)
+        if match is None:
+            index.add(value, {"image_path": image["image_path"]})
+            unique.append(image)
+            DEDUP_LOOKUPS.inc(result="miss")
+        elif "detection" in match:
+            reused.append({**image, **match["detection"]})
+            DEDUP_LOOKUPS.inc(result="cached")
+        else:
+            copies.setdefault(match["image_path"], []).append(image)
+            DEDUP_LOOKUPS.inc(result="in_run")
+
+    return unique, reused, copies
+
+
+def find_partition_images(partition_date, channels=None):
+    """
+    Lists the images referenced by the messages scraped on partition_date (YYYY-MM-DD),
+    i.e. by the files in data/raw/telegram_messages/{partition_date}/.
+    """
+    from src.loaders.postgres_loader import (
+        MESSAGES_DIR,
+        list_message_files,
+        iter_message_records,
+    )
+
+    wanted = {channel.strip("@") for channel in channels} if channels else None
+    files = list_message_files(os.path.join(MESSAGES_DIR, partition_date))
+
+    image_paths = set()
+    for record in iter_message_records(files):
+        image_path = record.get("image_path")
+        if not image_path or (wanted and record.get("channel_name") not in wanted):
+            continue
+        if os.path.exists(image_path):
+            image_paths.add(image_path)
+    return sorted(image_paths)
+
+
+def find_images(image_dir="data/raw/images", channels=None, partition_date=None):
+    """
+    Lists scraped images, optionally only those of the given channels
+    and/or those referenced by one day's messages.
+    """
+    if partition_date:
+        return find_partition_images(partition_date, channels)
+
+    if not channels:
+        return glob.glob(os.path.join(image_dir, "**", "*.jpg"), recursive=True)
+
+    image_paths = []
+    for channel in channels:
+        image_paths.extend(glob.glob(os.path.join(image_dir, channel.strip("@"), "*.jpg")))
+    return image_paths
+
+
+def main(workers=None, batch_size=None, channels=None, partition_date=None):
+    """
+    Enriches new or changed images (optionally only those of `channels`
+    and/or of the messages scraped on `partition_date`).
+    Returns enrichment stats, or None if inference or the database load failed.
+    """
+    logger.info("Starting AI Enrichment Process...")
+    started = time.perf_counter()
+
+    # Find Images
+    image_paths = find_images(channels=channels, partition_date=partition_date)
+    stats = {"images_found": len(image_paths), "images_enriched": 0, "detections_upserted": 0}
+
+    if not image_paths:
+        logger.warning("No images found to process.")
+        return stats
+
+    images = []
+    for img_path in image_paths:
+        try:
+            channel_name, message_id = parse_image_path(img_path)
+        except Exception as e:
+            logger.error(f"Skipping file due to path error {img_path}: {e}")
+            continue
+        images.append(
+            {
+                "image_path": img_path,
+                "channel_name": channel_name,
+                "message_id": message_id,
+            }
+        )
+
+    manifest = DetectionManifest(MANIFEST_PATH)
+    try:
+        # Only new, changed, or stale-model images go through YOLO
+        pending = manifest.find_pending(images, MODEL_VERSION)
+        logger.info(
+            f"{len(pending)} of {len(images)} images need enrichment "
+            f"(model version {MODEL_VERSION})."
+        )
+        stats["images_enriched"] = len(pending)
+
+        if pending:
+            # Reposted photos reuse the detection of a near-duplicate instead of reaching the model
+            if DEDUP_DISTANCE >= 0:
+                hash_images(pending, settings.YOLO_DECODE_THREADS)
+                unique, reused, copies = deduplicate(
+                    pending, manifest.hash_index(MODEL_VERSION), DEDUP_DISTANCE
+                )
+            else:
+                unique, reused, copies = pending, [], {}
+
+            hits = len(pending) - len(unique)
+            stats["images_inferred"] = len(unique)
+            stats["dedup_hits"] = hits
+            stats["dedup_hit_rate"] = round(hits / len(pending), 3)
+            logger.info(
+                f"Deduplication: {hits} of {len(pending)} images reuse a near-duplicate's "
+                f"detection ({stats['dedup_hit_rate']:.1%} hit rate); {len(unique)} go to the model."
+            )
+
+            # Each worker loads the model (Nano) once, or the model server is already running it
+            results = []
+            if unique:
+                unique_paths = [image["image_path"] for image in unique]
+                try:
+                    if settings.YOLO_SERVER_URL:
+                        results = run_remote_inference(unique_paths, batch_size)
+                    else:
+                        results = run_inference(unique_paths, workers, batch_size)
+                except Exception as e:
+                    logger.error(f"Inference failed: {e}")
+                    return None
+
+            unique_by_path = {image["image_path"]: image for image in unique}
+            records = list(reused)
+            for result in results:
+                records.append({**unique_by_path[result["image_path"]], **result})
+                detection = {column: result[column] for column in DETECTION_COLUMNS}
+                records.extend(
+                    {**copy, **detection} for copy in copies.get(result["image_path"], [])
+                )
+
+            if records:
+                # Record in the manifest only once detections are stored,
+                # so a failed load is retried on the next run.
+                try:
+                    upsert_detections(records)
+                    manifest.record(records, MODEL_VERSION)
+                    stats["detections_upserted"] = len(records)
+                    logger.info(
+                        f"Upserted {len(records)} detections into raw.image_detections"
+                    )
+                except Exception as e:
+                    logger.error(f"Database load failed: {e}")
+                    stats = None
+
+        # Save to CSV (full detection set, rebuilt from the manifest)
+        output_dir = "data/processed"
+        os.makedirs(output_dir, exist_ok=True)
+        csv_path = os.path.join(output_dir, "yolo_results.csv")
+
+        df = manifest.export_detections()
+        if not df.empty:
+            # Atomic replace: channel partitions may enrich concurrently
+            tmp_path = f"{csv_path}.{os.getpid()}.tmp"
+            df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, csv_path)
+            logger.info(f"Saved {len(df)} detection results to {csv_path}")
+        else:
+            logger.warning("No detections to save.")
+    finally:
+        manifest.close()
+
+    if stats is not None:
+        summary_path = write_run_summary(
+            "enrich", stats, started, prefix="yolo_", partition=partition_date
+        )
+        logger.info(f"Run summary written to {summary_path}")
+    return stats
 
 
 if __name__ == "__main__":
-    main()
+    from src.cli import main as cli_main
+
+    sys.exit(cli_main(["enrich", *sys.argv[1:]]))
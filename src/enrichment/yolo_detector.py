@@ -0,0 +1,208 @@
+import os
+import ast
+import logging
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Ultralytics predict() defaults, so both backends keep the same detections
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DETECTIONS = 300
+LETTERBOX_COLOR = 114
+
+
+class TorchBackend:
+    """
+    Runs the model through ultralytics/PyTorch (imported only when this backend is used).
+    """
+
+    name = "torch"
+
+    def __init__(self, model_path, imgsz, threads=None):
+        if threads:
+            import torch
+
+            torch.set_num_threads(threads)
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+
+    def detect(self, images):
+        """
+        Detects objects in images (paths or BGR arrays).
+        Returns one (class names, confidences) pair per image, highest confidence first.
+        """
+        results = self.model(images, imgsz=self.imgsz, verbose=False)
+        return [
+            (
+                [result.names[int(cls)] for cls in result.boxes.cls],
+                [float(conf) for conf in result.boxes.conf],
+            )
+            for result in results
+        ]
+
+
+def export_onnx(model_path, imgsz, int8=False):
+    """
+    Returns the path of the ONNX export of model_path (yolov8n.pt -> yolov8n.onnx),
+    exporting it with ultralytics on first use. With int8, the export is also
+    dynamically quantized to INT8 weights (yolov8n.int8.onnx).
+    """
+    onnx_path = os.path.splitext(model_path)[0] + ".onnx"
+    if not os.path.exists(onnx_path):
+        from ultralytics import YOLO
+
+        logger.info(f"Exporting {model_path} to ONNX...")
+        exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True)
+        if os.path.abspath(exported) != os.path.abspath(onnx_path):
+            os.replace(exported, onnx_path)
+
+    if not int8:
+        return onnx_path
+
+    int8_path = os.path.splitext(model_path)[0] + ".int8.onnx"
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"Quantizing {onnx_path} to INT8...")
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def letterbox_into(image, out, imgsz):
+    """
+    Writes a BGR image into `out` (a 3 x imgsz x imgsz float32 slice, already filled with
+    the grey padding) as ultralytics letterboxes it: resized to fit keeping its aspect
+    ratio, centered, RGB CHW. Values stay 0-255; the caller scales the whole batch.
+    """
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_width, new_height = round(width * scale), round(height * scale)
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    top = (imgsz - new_height) // 2
+    left = (imgsz - new_width) // 2
+    out[:, top : top + new_height, left : left + new_width] = image[:, :, ::-1].transpose(2, 0, 1)
+
+
+def non_max_suppression(boxes, scores, classes, iou_threshold):
+    """
+    Per-class NMS over xyxy boxes; returns kept indices, highest score first.
+    """
+    # Offsetting boxes by class keeps different classes from suppressing each other
+    offset = boxes + classes[:, None] * 7680.0
+    order = scores.argsort()[::-1]
+    areas = (offset[:, 2] - offset[:, 0]) * (offset[:, 3] - offset[:, 1])
+
+    keep = []
+    while order.size and len(keep) < MAX_DETECTIONS:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+
+        x1 = np.maximum(offset[best, 0], offset[rest, 0])
+        y1 = np.maximum(offset[best, 1], offset[rest, 1])
+        x2 = np.minimum(offset[best, 2], offset[rest, 2])
+        y2 = np.minimum(offset[best, 3], offset[rest, 3])
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return keep
+
+
+class OnnxBackend:
+    """
+    Runs the ONNX export of the model with ONNX Runtime on CPU (no torch import).
+    Pre- and post-processing mirror ultralytics: letterbox, confidence filter, per-class NMS.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path, imgsz, threads=None, int8=False):
+        import onnxruntime as ort
+
+        if int8:
+            self.name = "onnx-int8"
+        self.imgsz = imgsz
+        self._input = None
+        path = model_path if model_path.endswith(".onnx") else export_onnx(model_path, imgsz, int8)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+        # ultralytics stores the class names in the export's metadata as a dict literal
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"])
+
+    def _preprocess(self, images):
+        # The input tensor is preallocated once and reused for every batch (grown if needed)
+        if self._input is None or len(self._input) < len(images):
+            self._input = np.empty((len(images), 3, self.imgsz, self.imgsz), dtype=np.float32)
+        batch = self._input[: len(images)]
+        batch.fill(LETTERBOX_COLOR)
+
+        for out, image in zip(batch, images):
+            if isinstance(image, str):
+                path = image
+                image = cv2.imread(path)
+                if image is None:
+                    raise ValueError(f"Could not decode image {path}")
+            letterbox_into(image, out, self.imgsz)
+        batch /= 255.0
+        return batch
+
+    def _postprocess(self, prediction):
+        # prediction: (4 + classes, anchors) with cx, cy, w, h then per-class scores
+        prediction = prediction.T
+        class_scores = prediction[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+
+        mask = scores > CONF_THRESHOLD
+        if not mask.any():
+            return [], []
+        xywh, scores, classes = prediction[mask, :4], scores[mask], classes[mask]
+
+        boxes = np.empty_like(xywh)
+        boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+        boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+
+        keep = non_max_suppression(boxes, scores, classes, IOU_THRESHOLD)
+        return (
+            [self.names[int(classes[i])] for i in keep],
+            [float(scores[i]) for i in keep],
+        )
+
+    def detect(self, images):
+        """
+        Detects objects in images (paths or BGR arrays).
+        Returns one (class names, confidences) pair per image, highest confidence first.
+        """
+        if not images:
+            return []
+        outputs = self.session.run(None, {self.input_name: self._preprocess(images)})[0]
+        return [self._postprocess(prediction) for prediction in outputs]
+
+
+def load_backend(name, model_path, imgsz, threads=None):
+    """
+    Returns the inference backend called name (one of BACKENDS).
+    """
+    if name == "torch":
+        return TorchBackend(model_path, imgsz, threads)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxBackend(model_path, imgsz, threads, int8=name == "onnx-int8")
+    raise ValueError(f"Unknown inference backend '{name}', expected one of {BACKENDS}")
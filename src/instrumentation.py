@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import uuid
+import bisect
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.config import settings
+
+# Seconds; spans a cache hit (~1ms) to a slow batch or query (~30s)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    A named metric with a fixed set of label names; one value per label combination.
+    Thread-safe, so decode threads and API handlers can record concurrently.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def export_state(self):
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing total (messages scraped, bytes downloaded, rows loaded).
+    """
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def merge_state(self, state):
+        with self._lock:
+            for key, value in state.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+    def snapshot(self, elapsed=None):
+        with self._lock:
+            samples = []
+            for key, value in sorted(self._values.items()):
+                sample = {"labels": dict(zip(self.labelnames, key)), "value": value}
+                if elapsed:
+                    sample["per_sec"] = round(value / elapsed, 2)
+                samples.append(sample)
+            return samples
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values (latencies in seconds) in fixed buckets.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _copy(self, value):
+        counts, total, count = value
+        return [list(counts), total, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # One count per bucket plus +Inf, then sum and count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the wall time of the with-block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def merge_state(self, state):
+        with self._lock:
+            for key, (counts, total, count) in state.items():
+                entry = self._values.setdefault(
+                    key, [[0] * (len(self.buckets) + 1), 0.0, 0]
+                )
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+    def render(self):
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, [("le", bound)])
+                    yield f"{self.name}_bucket{labels} {cumulative}"
+                labels = _format_labels(self.labelnames, key)
+                yield f"{self.name}_sum{labels} {total}"
+                yield f"{self.name}_count{labels} {count}"
+
+    def _quantile(self, counts, count, q):
+        # Upper bound of the bucket holding the q-th observation
+        rank = q * count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return None
+
+    def snapshot(self, elapsed=None):
+        with self._lock:
+            samples = []
+            for key, (counts, total, count) in sorted(self._values.items()):
+                samples.append(
+                    {
+                        "labels": dict(zip(self.labelnames, key)),
+                        "count": count,
+                        "sum": round(total, 6),
+                        "mean": round(total / count, 6) if count else 0.0,
+                        "p50_le": self._quantile(counts, count, 0.5),
+                        "p95_le": self._quantile(counts, count, 0.95),
+                    }
+                )
+            return samples
+
+
+class Registry:
+    """
+    Process-wide collection of metrics, looked up (or created) by name.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self):
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, prefix="", elapsed=None):
+        """
+        Returns JSON-friendly values of the metrics whose names start with prefix.
+        Counters gain a per_sec rate when elapsed (seconds) is given.
+        """
+        return {
+            name: metric.snapshot(elapsed)
+            for name, metric in sorted(self._metrics.items())
+            if name.startswith(prefix)
+        }
+
+    def export_state(self):
+        """
+        Returns picklable raw values, so a worker process can hand its metrics to the parent.
+        """
+        return {name: metric.export_state() for name, metric in self._metrics.items()}
+
+    def merge_state(self, state):
+        """
+        Adds values exported by another process (metrics must be registered here too).
+        """
+        for name, values in state.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge_state(values)
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+
+
+def write_run_summary(stage, stats, started, prefix="", directory=None, partition=None):
+    """
+    Writes {directory}/{stage}-{UTC timestamp}[-{partition}]-{pid}-{random}.json with the
+    stage's stats, elapsed time and a snapshot of its metrics (names starting with prefix).
+    The suffix keeps concurrent stages and backfill partitions from overwriting each other.
+    Returns the path. `started` is a time.perf_counter() value taken when the stage began.
+    """
+    directory = directory or settings.METRICS_SUMMARY_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    finished_at = datetime.now(timezone.utc)
+    elapsed = time.perf_counter() - started
+    summary = {
+        "stage": stage,
+        "partition": partition,
+        "finished_at": finished_at.isoformat(),
+        "elapsed_seconds": round(elapsed, 2),
+        "stats": stats,
+        "metrics": REGISTRY.snapshot(prefix, elapsed),
+    }
+
+    name = "-".join(
+        part
+        for part in (stage, finished_at.strftime("%Y%m%dT%H%M%SZ"), partition, str(os.getpid()))
+        if part
+    )
+    path = os.path.join(directory, f"{name}-{uuid.uuid4().hex[:8]}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+    os.replace(tmp_path, path)
+    return path
@@ -1,116 +1,555 @@
 import os
+import io
 import json
+import numpy as np
 import pandas as pd
 import logging
 import glob
-from sqlalchemy import create_engine, text
-from datetime import datetime
+import time
+from sqlalchemy import create_engine
 
 # Configure logging
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 from src.config import settings
+from src.instrumentation import counter, histogram, write_run_summary
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 # Database Credentials
 DB_CONNECTION_STR = settings.DB_CONNECTION_STR
 
+# Rows parsed, copied and merged per round trip; bounds loader memory
+CHUNK_SIZE = settings.LOADER_CHUNK_SIZE
 
-def load_json_files(base_directory):
+TARGET_TABLE = "raw.telegram_messages"
+STAGING_TABLE = "telegram_messages_staging"
+WATERMARK_TABLE = "raw.load_watermarks"
+
+# Declared schema of raw messages: (pandas dtype after clean_data, Postgres type)
+MESSAGE_SCHEMA = {
+    "message_id": ("int64", "BIGINT"),
+    "channel_name": ("category", "TEXT"),
+    "channel_title": ("string", "TEXT"),
+    "message_date": ("datetime64[ns, UTC]", "TIMESTAMPTZ"),
+    "message_text": ("string", "TEXT"),
+    "has_media": ("boolean", "BOOLEAN"),
+    "image_path": ("string", "TEXT"),
+    "views": ("Int32", "INTEGER"),
+    "forwards": ("Int32", "INTEGER"),
+}
+# Column layout of raw.telegram_messages (and the staging table)
+MESSAGE_COLUMNS = {name: pg_type for name, (_, pg_type) in MESSAGE_SCHEMA.items()}
+MESSAGE_DTYPES = {name: dtype for name, (dtype, _) in MESSAGE_SCHEMA.items()}
+KEY_COLUMNS = ["message_id", "channel_name"]
+
+# information_schema.columns.data_type of each declared Postgres type
+PG_TYPE_NAMES = {
+    "BIGINT": "bigint",
+    "INTEGER": "integer",
+    "TEXT": "text",
+    "TIMESTAMPTZ": "timestamp with time zone",
+    "BOOLEAN": "boolean",
+}
+INT32_MAX = 2**31 - 1
+BOOLEAN_VALUES = {True: True, False: False, "true": True, "false": False, "True": True, "False": False}
+
+# Rows that fail validation are appended here (NDJSON, with the reason) instead of loaded
+QUARANTINE_PATH = settings.LOADER_QUARANTINE_PATH
+
+
+MESSAGES_DIR = "data/raw/telegram_messages"
+
+ROWS_LOADED = counter("loader_rows_total", "Rows merged into raw.telegram_messages")
+ROWS_QUARANTINED = counter(
+    "loader_quarantined_rows_total", "Rows rejected by validation", ["reason"]
+)
+CHUNK_SECONDS = histogram(
+    "loader_chunk_seconds", "Time per chunk in each load phase", ["phase"]
+)
+
+# Scraper output formats the loader understands
+MESSAGE_FILE_PATTERNS = ["*.json", "*.ndjson", "*.parquet"]
+
+
+def list_message_files(base_directory):
     """
-    Recursively finds and reads all JSON files in the specified directory structure.
-    Expected structure: data/raw/telegram_messages/YYYY-MM-DD/*.json
+    Recursively finds all message files (JSON, NDJSON or Parquet) in the directory structure.
+    Expected structure: data/raw/telegram_messages/YYYY-MM-DD/*.{json,ndjson,parquet}
     """
-    # Recursive glob pattern
-    search_pattern = os.path.join(base_directory, "**", "*.json")
-    json_files = glob.glob(search_pattern, recursive=True)
+    files = []
+    for pattern in MESSAGE_FILE_PATTERNS:
+        search_pattern = os.path.join(base_directory, "**", pattern)
+        files.extend(glob.glob(search_pattern, recursive=True))
+    return sorted(files)
 
-    if not json_files:
-        logger.warning(
-            f"No JSON files found in {base_directory} (recursively). Exiting gracefully."
-        )
-        return None
 
-    all_data = []
-    for file in json_files:
+def iter_file_records(file):
+    """
+    Yields the records of a single message file.
+    NDJSON is read line by line and Parquet batch by batch, so memory stays constant;
+    legacy JSON arrays have to be parsed whole.
+    """
+    if file.endswith(".ndjson"):
+        with open(file, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    # e.g. a line cut short by an interrupted scrape
+                    logger.error(f"Skipping bad line {line_number} in {file}: {e}")
+
+    elif file.endswith(".parquet"):
+        # Optional dependency, only needed for Parquet partitions
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(file)
+        for batch in parquet_file.iter_batches(batch_size=CHUNK_SIZE):
+            yield from batch.to_pylist()
+
+    else:
+        with open(file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if isinstance(data, dict):
+            yield data
+        elif isinstance(data, list):
+            yield from data
+
+
+def iter_message_records(files, row_counts=None):
+    """
+    Yields message records one file at a time, streaming within each file where the format allows.
+    If row_counts is given, it is filled with {file: rows} for every file read successfully.
+    """
+    for file in files:
+        rows = 0
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    all_data.extend(data)
-                elif isinstance(data, dict):
-                    all_data.append(data)
-            logger.info(f"Loaded data from {file}")
+            for record in iter_file_records(file):
+                rows += 1
+                yield record
         except Exception as e:
             logger.error(f"Error reading {file}: {e}")
+            continue
 
-    return all_data
+        if row_counts is not None:
+            row_counts[file] = rows
+        logger.info(f"Loaded {rows} records from {file}")
+
+
+def load_json_files(base_directory):
+    """
+    Recursively finds all message files and yields their records.
+    Expected structure: data/raw/telegram_messages/YYYY-MM-DD/*.{json,ndjson,parquet}
+    """
+    files = list_message_files(base_directory)
+
+    if not files:
+        logger.warning(
+            f"No message files found in {base_directory} (recursively). Exiting gracefully."
+        )
+        return
+
+    yield from iter_message_records(files)
+
+
+def iter_chunks(records, chunk_size):
+    """
+    Groups an iterable of records into lists of at most chunk_size.
+    """
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def quarantine_rows(rows, reasons):
+    """
+    Appends rejected rows (original values) with their rejection reason to QUARANTINE_PATH.
+    """
+    os.makedirs(os.path.dirname(QUARANTINE_PATH) or ".", exist_ok=True)
+    rejected = rows.assign(
+        _reason=reasons.to_numpy(),
+        _quarantined_at=pd.Timestamp.now(tz="UTC").isoformat(),
+    )
+    lines = rejected.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+    with open(QUARANTINE_PATH, "a", encoding="utf-8") as f:
+        f.write(lines if lines.endswith("\n") else lines + "\n")
+
+    for reason, count in reasons.value_counts().items():
+        ROWS_QUARANTINED.inc(int(count), reason=reason)
+    logger.warning(f"Quarantined {len(rows)} invalid rows to {QUARANTINE_PATH}.")
 
 
 def clean_data(df):
     """
-    Cleans the DataFrame: checks for required columns, converts dates, etc.
+    Coerces a chunk to MESSAGE_SCHEMA and validates it in one vectorized pass.
+    Rows with a missing, non-numeric or non-integer key, an unparseable date, or negative,
+    fractional or out-of-range counts are quarantined instead of loaded.
+    Duplicate keys keep their first row.
     """
     if df.empty:
         return df
 
-    # Ensure 'message_date' is datetime
-    if "message_date" in df.columns:
-        df["message_date"] = pd.to_datetime(df["message_date"], errors="coerce")
+    # Align to the raw table layout; missing fields become nulls
+    raw = df.reindex(columns=list(MESSAGE_SCHEMA))
 
-    # Remove duplicates if 'message_id' and 'channel_name' exists
-    if "message_id" in df.columns and "channel_name" in df.columns:
-        df.drop_duplicates(subset=["message_id", "channel_name"], inplace=True)
+    message_id = pd.to_numeric(raw["message_id"], errors="coerce")
+    channel_name = raw["channel_name"].astype("string").str.strip()
+    # Any ISO-8601 precision per value; without a format, pandas infers one from the first
+    # value and rejects the rest (e.g. timestamps without fractional seconds)
+    message_date = pd.to_datetime(
+        raw["message_date"], errors="coerce", utc=True, format="ISO8601"
+    )
+    views = pd.to_numeric(raw["views"], errors="coerce")
+    forwards = pd.to_numeric(raw["forwards"], errors="coerce")
 
-    return df
+    def invalid_count(parsed, original):
+        unparseable = parsed.isna() & original.notna()
+        out_of_range = parsed.notna() & ((parsed % 1 != 0) | ~parsed.between(0, INT32_MAX))
+        return unparseable | out_of_range
 
+    # First failing check names the reason
+    checks = {
+        "missing message_id": raw["message_id"].isna(),
+        "invalid_type message_id": message_id.isna(),
+        "invalid message_id": (message_id % 1 != 0) | (message_id <= 0),
+        "missing channel_name": channel_name.fillna("") == "",
+        "unparseable message_date": message_date.isna() & raw["message_date"].notna(),
+        "invalid views": invalid_count(views, raw["views"]),
+        "invalid forwards": invalid_count(forwards, raw["forwards"]),
+    }
+    reasons = pd.Series(
+        np.select(
+            [mask.to_numpy(dtype=bool) for mask in checks.values()],
+            list(checks),
+            default="",
+        ),
+        index=raw.index,
+    )
+    rejected = reasons != ""
+    if rejected.any():
+        quarantine_rows(raw[rejected], reasons[rejected])
 
-def main():
-    json_dir = "data/raw/telegram_messages"
+    valid = ~rejected
+    df = pd.DataFrame(
+        {
+            "message_id": message_id[valid],
+            "channel_name": channel_name[valid],
+            "channel_title": raw["channel_title"][valid],
+            "message_date": message_date[valid],
+            "message_text": raw["message_text"][valid],
+            "has_media": raw["has_media"][valid].map(BOOLEAN_VALUES),
+            "image_path": raw["image_path"][valid],
+            "views": views[valid],
+            "forwards": forwards[valid],
+        }
+    ).astype(MESSAGE_DTYPES)
 
-    logger.info("Starting data loading process...")
+    # Remove duplicates on 'message_id' and 'channel_name'
+    return df.drop_duplicates(subset=KEY_COLUMNS)
 
-    raw_data = load_json_files(json_dir)
 
-    if not raw_data:
-        return
+def align_column_types(cursor):
+    """
+    Converts columns of an existing raw.telegram_messages whose type differs from
+    MESSAGE_SCHEMA (e.g. DOUBLE PRECISION views left by the old to_sql load).
+    """
+    schema, table = TARGET_TABLE.split(".")
+    cursor.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = %s AND table_name = %s",
+        (schema, table),
+    )
+    for column, data_type in cursor.fetchall():
+        expected = MESSAGE_COLUMNS.get(column)
+        if expected and data_type != PG_TYPE_NAMES[expected]:
+            logger.info(f"Converting {TARGET_TABLE}.{column} from {data_type} to {expected}.")
+            cursor.execute(
+                f"ALTER TABLE {TARGET_TABLE} ALTER COLUMN {column} "
+                f"TYPE {expected} USING {column}::{expected};"
+            )
 
-    df = pd.DataFrame(raw_data)
-    logger.info(f"Combined DataFrame created with {len(df)} records.")
 
-    # Clean Data
-    df = clean_data(df)
+def ensure_tables(cursor):
+    """
+    Creates the raw schema, the target table with its merge key and search index,
+    the load watermark table, and a session staging table.
+    """
+    column_defs = ",\n".join(f"{name} {type_}" for name, type_ in MESSAGE_COLUMNS.items())
 
-    # Load to Postgres
+    cursor.execute("CREATE SCHEMA IF NOT EXISTS raw;")
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {TARGET_TABLE} "
+        f"({column_defs},\nPRIMARY KEY ({', '.join(KEY_COLUMNS)}));"
+    )
+    align_column_types(cursor)
+    # Tables created by the old to_sql load have no key; ON CONFLICT needs one.
+    # Promoting the unique index to the primary key also makes the key columns NOT NULL.
+    cursor.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = '{TARGET_TABLE}'::regclass AND contype = 'p'
+            ) THEN
+                CREATE UNIQUE INDEX IF NOT EXISTS telegram_messages_message_channel_idx
+                    ON {TARGET_TABLE} ({', '.join(KEY_COLUMNS)});
+                ALTER TABLE {TARGET_TABLE} ADD CONSTRAINT telegram_messages_pkey
+                    PRIMARY KEY USING INDEX telegram_messages_message_channel_idx;
+            END IF;
+        END $$;
+    """)
+    # Incremental dbt models pick up rows by when they were last inserted or changed
+    cursor.execute(
+        f"ALTER TABLE {TARGET_TABLE} "
+        "ADD COLUMN IF NOT EXISTS loaded_at TIMESTAMPTZ NOT NULL DEFAULT now();"
+    )
+    # Full-text search: Postgres keeps the tsvector in sync on every write.
+    # 'simple' does no stemming or stop words, which suits mixed Amharic/English text.
+    cursor.execute(f"""
+        ALTER TABLE {TARGET_TABLE} ADD COLUMN IF NOT EXISTS message_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', coalesce(message_text, ''))) STORED;
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS telegram_messages_tsv_idx "
+        f"ON {TARGET_TABLE} USING GIN (message_tsv);"
+    )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            file_path TEXT PRIMARY KEY,
+            file_mtime DOUBLE PRECISION NOT NULL,
+            file_size BIGINT NOT NULL,
+            row_count INTEGER NOT NULL,
+            loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} ({column_defs});")
+
+
+def stat_files(files):
+    """
+    Returns {file: (mtime, size)} for the given files.
+    """
+    stats = {}
+    for file in files:
+        stat = os.stat(file)
+        stats[file] = (stat.st_mtime, stat.st_size)
+    return stats
+
+
+def find_changed_files(cursor, file_stats):
+    """
+    Returns the files whose mtime or size differs from their load watermark (or that have none).
+    """
+    cursor.execute(f"SELECT file_path, file_mtime, file_size FROM {WATERMARK_TABLE};")
+    watermarks = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+    return [file for file, stat in file_stats.items() if watermarks.get(file) != stat]
+
+
+def record_watermarks(cursor, file_stats, row_counts):
+    """
+    Upserts the watermark of every file that was read successfully.
+    """
+    for file, row_count in row_counts.items():
+        mtime, size = file_stats[file]
+        cursor.execute(
+            f"""
+            INSERT INTO {WATERMARK_TABLE} (file_path, file_mtime, file_size, row_count, loaded_at)
+            VALUES (%s, %s, %s, %s, now())
+            ON CONFLICT (file_path) DO UPDATE SET
+                file_mtime = EXCLUDED.file_mtime,
+                file_size = EXCLUDED.file_size,
+                row_count = EXCLUDED.row_count,
+                loaded_at = EXCLUDED.loaded_at;
+            """,
+            (file, mtime, size, row_count),
+        )
+
+
+def copy_chunk(cursor, df):
+    """
+    Streams a cleaned chunk into the staging table with COPY FROM STDIN.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+
+    cursor.copy_expert(
+        f"COPY {STAGING_TABLE} ({', '.join(df.columns)}) "
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        buffer,
+    )
+
+
+def merge_staging(cursor):
+    """
+    Upserts the staging table into the target table and empties it for the next chunk.
+    Rows that did not change are left untouched, so their loaded_at stays put and
+    incremental dbt models skip them.
+    """
+    columns = ", ".join(MESSAGE_COLUMNS)
+    value_columns = [name for name in MESSAGE_COLUMNS if name not in KEY_COLUMNS]
+    updates = ",\n".join(f"{name} = EXCLUDED.{name}" for name in value_columns)
+
+    cursor.execute(f"""
+        INSERT INTO {TARGET_TABLE} AS t ({columns})
+        SELECT {columns} FROM {STAGING_TABLE}
+        ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET
+        {updates},
+        loaded_at = now()
+        WHERE ({', '.join(f't.{name}' for name in value_columns)})
+            IS DISTINCT FROM ({', '.join(f'EXCLUDED.{name}' for name in value_columns)});
+    """)
+    merged = cursor.rowcount
+    cursor.execute(f"TRUNCATE {STAGING_TABLE};")
+    return merged
+
+
+def load_records(records, connection, chunk_size=CHUNK_SIZE, commit=True):
+    """
+    Streams records into raw.telegram_messages in fixed-size chunks:
+    COPY each chunk into a staging table, then merge it with ON CONFLICT.
+    Each chunk is committed, unless commit is False (the caller commits them all at once).
+    Returns the number of rows merged.
+    """
+    cursor = connection.cursor()
+    total = 0
+    chunks = iter_chunks(records, chunk_size)
+
+    while True:
+        # Reading and parsing the files happens as the next chunk is pulled
+        with CHUNK_SECONDS.time(phase="parse"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+
+        with CHUNK_SECONDS.time(phase="clean"):
+            df = clean_data(pd.DataFrame(chunk))
+        if df.empty:
+            continue
+
+        with CHUNK_SECONDS.time(phase="copy"):
+            copy_chunk(cursor, df)
+        with CHUNK_SECONDS.time(phase="merge"):
+            merged = merge_staging(cursor)
+            if commit:
+                connection.commit()
+        total += merged
+        ROWS_LOADED.inc(merged)
+        logger.info(f"Merged chunk of {len(df)} rows ({total} total).")
+
+    return total
+
+
+def load_directory(base_directory, engine, full_refresh=False):
+    """
+    Loads new or changed message files under base_directory into raw.telegram_messages.
+    Unchanged files (same mtime and size as their watermark) are skipped.
+    With full_refresh, the table and watermarks are cleared and every file is reloaded, all
+    in one transaction: a reload that fails leaves the previous data in place (readers of
+    raw.telegram_messages wait on the truncate's lock until it commits).
+    Returns a dict with files_found, files_loaded and rows_merged.
+    """
+    files = list_message_files(base_directory)
+
+    if not files:
+        logger.warning(
+            f"No message files found in {base_directory} (recursively). Exiting gracefully."
+        )
+        return {"files_found": 0, "files_loaded": 0, "rows_merged": 0}
+
+    file_stats = stat_files(files)
+
+    connection = engine.raw_connection()
     try:
-        engine = create_engine(DB_CONNECTION_STR)
+        cursor = connection.cursor()
+        ensure_tables(cursor)
 
-        # Create schema 'raw' if it doesn't exist
-        with engine.connect() as connection:
-            connection.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
-            connection.commit()
+        connection.commit()
 
-        table_name = "telegram_messages"
-        schema_name = "raw"
+        if full_refresh:
+            # Not committed until every file is reloaded
+            logger.info("Full refresh: truncating target and watermark tables.")
+            cursor.execute(f"TRUNCATE {TARGET_TABLE}, {WATERMARK_TABLE};")
+            changed_files = files
+        else:
+            changed_files = find_changed_files(cursor, file_stats)
 
-        logger.info(f"Writing data to table '{schema_name}.{table_name}'...")
+        logger.info(
+            f"{len(changed_files)} of {len(files)} files are new or changed."
+        )
+        if not changed_files:
+            return {"files_found": len(files), "files_loaded": 0, "rows_merged": 0}
 
-        # Load data to raw.telegram_messages
-        df.to_sql(
-            table_name, engine, schema=schema_name, if_exists="replace", index=False
+        row_counts = {}
+        total = load_records(
+            iter_message_records(changed_files, row_counts), connection, commit=not full_refresh
         )
 
-        logger.info("Data loaded successfully.")
+        # Watermarks only advance once every chunk of the file has been merged
+        record_watermarks(cursor, file_stats, row_counts)
+        connection.commit()
+
+        return {
+            "files_found": len(files),
+            "files_loaded": len(row_counts),
+            "rows_merged": total,
+        }
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def main(full_refresh=False, partition_date=None):
+    """
+    Loads scraped message files into Postgres. Returns load stats, or None on failure.
+    With partition_date (YYYY-MM-DD), only that day's directory is loaded.
+    """
+    json_dir = MESSAGES_DIR
+    if partition_date:
+        if full_refresh:
+            logger.error("--full-refresh truncates every partition; it cannot be combined with a date.")
+            return None
+        json_dir = os.path.join(MESSAGES_DIR, partition_date)
+
+    logger.info("Starting data loading process...")
+    start = time.perf_counter()
+
+    # Load to Postgres
+    try:
+        engine = create_engine(DB_CONNECTION_STR)
+
+        logger.info(f"Streaming data into table '{TARGET_TABLE}'...")
+        stats = load_directory(json_dir, engine, full_refresh=full_refresh)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Data loaded successfully: {stats['rows_merged']} rows merged from "
+            f"{stats['files_loaded']} files in {elapsed:.1f}s."
+        )
+        summary_path = write_run_summary(
+            "load", stats, start, prefix="loader_", partition=partition_date
+        )
+        logger.info(f"Run summary written to {summary_path}")
+        return stats
 
     except Exception as e:
         logger.error(f"Failed to write to database: {e}")
+        return None
 
 
 if __name__ == "__main__":
-    main()
+    from src.cli import main as cli_main
+
+    sys.exit(cli_main(["load", *sys.argv[1:]]))
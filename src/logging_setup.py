@@ -0,0 +1,31 @@
+import os
+import logging
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Handlers already installed by configure_logging: None (console) or (logger name, log file)
+_installed = set()
+
+
+def configure_logging(log_file=None, logger_name="src", level=logging.INFO):
+    """
+    Logs to the console, and also to log_file for the records of logger_name and its
+    children (e.g. "src.enrichment"). Called by entry points, not at import, so importing
+    a stage module has no side effects; safe to call once per stage in the same process.
+    """
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    if None not in _installed:
+        root = logging.getLogger()
+        handler = logging.StreamHandler()
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+        root.setLevel(level)
+        _installed.add(None)
+
+    if log_file and (logger_name, log_file) not in _installed:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        handler = logging.FileHandler(log_file)
+        handler.setFormatter(formatter)
+        logging.getLogger(logger_name).addHandler(handler)
+        _installed.add((logger_name, log_file))
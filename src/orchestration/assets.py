@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import asyncio
+from datetime import datetime, timezone
+from dagster import (
+    asset,
+    Failure,
+    AssetSelection,
+    MaterializeResult,
+    DailyPartitionsDefinition,
+    define_asset_job,
+    build_schedule_from_partitioned_job,
+)
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+from src.config import settings
+from src.orchestration.dbt_build import dbt_build, record_pipeline_run
+
+# One partition per data/raw/telegram_messages/YYYY-MM-DD directory.
+# end_offset=1 makes today a partition, so the daily run scrapes into its own directory.
+daily_partitions = DailyPartitionsDefinition(
+    start_date=settings.PIPELINE_START_DATE, end_offset=1
+)
+
+
+def stage_metadata(stats, started, stage):
+    """
+    Returns a stage's numeric stats plus runtime_seconds as Dagster metadata.
+    Raises Failure if the stage reported failure (stats is None).
+    """
+    if stats is None:
+        raise Failure(f"{stage} failed; see the logs for details.")
+
+    metadata = {key: value for key, value in stats.items() if isinstance(value, (int, float))}
+    metadata["runtime_seconds"] = round(time.perf_counter() - started, 2)
+    return metadata
+
+
+def run_dbt_build(log):
+    """
+    Runs `dbt build` in-process and returns node counts; a failed build fails the step.
+    """
+    try:
+        return dbt_build(log)
+    except RuntimeError as e:
+        raise Failure(str(e))
+
+
+@asset(partitions_def=daily_partitions, group_name="telehealth")
+def raw_telegram_messages(context):
+    """
+    Messages scraped on the partition's day, loaded into raw.telegram_messages.
+    Only today's partition scrapes (the scraper writes into today's directory);
+    earlier partitions reload their directory, skipping files already watermarked.
+    """
+    from src.loaders import postgres_loader
+
+    started = time.perf_counter()
+    day = context.partition_key
+    metadata = {}
+
+    # Partitions are UTC days, whatever the host's time zone
+    if day == datetime.now(timezone.utc).strftime("%Y-%m-%d"):
+        from src.collectors import telegram_scraper
+
+        context.log.info("Starting Telegram Scrape...")
+        scrape_stats = asyncio.run(telegram_scraper.main())
+        metadata.update(stage_metadata(scrape_stats, started, "Telegram scrape"))
+        context.log.info("Telegram Scrape Complete.")
+
+    context.log.info(f"Loading messages for {day}...")
+    load_stats = postgres_loader.main(partition_date=day)
+    metadata.update(stage_metadata(load_stats, started, "Postgres load"))
+    return MaterializeResult(metadata=metadata)
+
+
+@asset(partitions_def=daily_partitions, group_name="telehealth", deps=[raw_telegram_messages])
+def image_detections(context):
+    """
+    YOLO detections (raw.image_detections) for the images of the partition's messages.
+    """
+    from src.enrichment import yolo_detect
+
+    started = time.perf_counter()
+    context.log.info(f"Enriching images for {context.partition_key}...")
+    stats = yolo_detect.main(partition_date=context.partition_key)
+    return MaterializeResult(metadata=stage_metadata(stats, started, "AI enrichment"))
+
+
+@asset(
+    partitions_def=daily_partitions,
+    group_name="telehealth",
+    deps=[raw_telegram_messages, image_detections],
+    # dbt builds of different partitions would race on the same incremental models
+    op_tags={"dagster/concurrency_key": "dbt"},
+)
+def dbt_marts(context):
+    """
+    dbt staging and mart models. The incremental models pick up whatever rows the
+    partition's load and enrichment added (by loaded_at / detected_at).
+    """
+    started = time.perf_counter()
+    stats = run_dbt_build(context.log)
+
+    run_id = record_pipeline_run(context.run_id)
+    context.log.info(f"Recorded pipeline run {run_id}; API caches will refresh.")
+    return MaterializeResult(metadata=stage_metadata(stats, started, "dbt build"))
+
+
+daily_assets_job = define_asset_job(
+    "telehealth_daily_assets",
+    selection=AssetSelection.assets(raw_telegram_messages, image_detections, dbt_marts),
+    partitions_def=daily_partitions,
+)
+
+# Materializes today's partition just after midnight
+daily_assets_schedule = build_schedule_from_partitioned_job(daily_assets_job, hour_of_day=0)
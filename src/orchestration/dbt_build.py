@@ -0,0 +1,40 @@
+DBT_PROJECT_DIR = "dbt_project"
+
+
+def dbt_build(log, args=()):
+    """
+    Runs `dbt build` in-process (extra CLI args appended) and returns node counts.
+    Raises RuntimeError if the build fails. Used by the Dagster assets and `python -m src`.
+    """
+    from dbt.cli.main import dbtRunner
+
+    log.info("Starting dbt transformations...")
+    result = dbtRunner().invoke(
+        ["build", "--project-dir", DBT_PROJECT_DIR, "--profiles-dir", DBT_PROJECT_DIR, *args]
+    )
+    if not result.success:
+        raise RuntimeError(f"dbt build failed: {result.exception or 'see dbt logs'}")
+    log.info("dbt Transformations Complete.")
+
+    statuses = [str(node.status) for node in result.result]
+    return {
+        "nodes": len(statuses),
+        "succeeded": sum(status in ("success", "pass") for status in statuses),
+        "warnings": statuses.count("warn"),
+    }
+
+
+def record_pipeline_run(run_id=None):
+    """
+    Records a completed pipeline run (invalidating the API cache) and returns its run_id.
+    """
+    from sqlalchemy import create_engine
+
+    from src.config import settings
+    from src.orchestration.run_registry import bump_pipeline_run
+
+    engine = create_engine(settings.DB_CONNECTION_STR)
+    try:
+        return bump_pipeline_run(engine, run_id)
+    finally:
+        engine.dispose()
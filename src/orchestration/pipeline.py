@@ -1,64 +1,138 @@
-import subprocess
 import os
-from dagster import op, job, logger, ScheduleDefinition, Definitions
+import sys
+import time
+import asyncio
+from dagster import (
+    op,
+    job,
+    Output,
+    Definitions,
+    StaticPartitionsDefinition,
+)
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+from src.config import settings
+from src.orchestration.dbt_build import record_pipeline_run
+from src.orchestration.assets import (
+    raw_telegram_messages,
+    image_detections,
+    dbt_marts,
+    daily_assets_job,
+    daily_assets_schedule,
+    stage_metadata,
+    run_dbt_build,
+)
 
-@op
-def scrape_telegram():
-    """Run the Telegram scraper script."""
-    logger.info("Starting Telegram Scrape...")
-    subprocess.run(["python", "src/collectors/telegram_scraper.py"], check=True)
-    logger.info("Telegram Scrape Complete.")
+# One partition per channel, so channels can be scraped and enriched in parallel runs
+channel_partitions = StaticPartitionsDefinition(
+    [channel.strip("@") for channel in settings.TELEGRAM_CHANNELS]
+)
+
+
+def partition_channels(context):
+    """
+    Channels an op should process: the run's channel partition, or all channels (None).
+    """
+    if context.has_partition_key:
+        return [context.partition_key]
+    return None
+
+
+def stage_output(stats, started, stage):
+    """
+    Wraps a stage's stats as an op Output, with row counts and runtime as Dagster metadata.
+    """
+    return Output(stats, metadata=stage_metadata(stats, started, stage))
+
+
+# Stage modules are imported inside each op: the code location stays light, and only the
+# step that enriches pays the model backend import.
+
+
+# Scrapes share one Telegram session and account-wide rate limit, so channel partitions
+# scrape one at a time (see dagster_home/dagster.yaml) and enrich in parallel
+@op(op_tags={"dagster/concurrency_key": "telegram"})
+def scrape_telegram(context):
+    """Run the Telegram scraper in-process."""
+    from src.collectors import telegram_scraper
+
+    started = time.perf_counter()
+    context.log.info("Starting Telegram Scrape...")
+    channels = partition_channels(context)
+    stats = asyncio.run(
+        telegram_scraper.main(channels=[f"@{c}" for c in channels] if channels else None)
+    )
+    context.log.info("Telegram Scrape Complete.")
+    return stage_output(stats, started, "Telegram scrape")
 
 
 @op
-def load_data(start_after_scrape):
-    """Run the Postgres loader script. Depends on scrape completion."""
-    logger.info("Starting Postgres Load...")
-    subprocess.run(["python", "src/loaders/postgres_loader.py"], check=True)
-    logger.info("Postgres Load Complete.")
+def load_data(context, start_after_scrape):
+    """Run the Postgres loader in-process. Depends on scrape completion."""
+    from src.loaders import postgres_loader
+
+    started = time.perf_counter()
+    context.log.info("Starting Postgres Load...")
+    stats = postgres_loader.main()
+    context.log.info("Postgres Load Complete.")
+    return stage_output(stats, started, "Postgres load")
 
 
 @op
-def enrich_data(start_after_load):
-    """Run the YOLO enrichment script. Depends on data load (image availability)."""
-    logger.info("Starting AI Enrichment...")
+def enrich_data(context, start_after_scrape):
+    """
+    Run the YOLO enrichment in-process. Depends only on the scrape (image availability),
+    so it runs in parallel with the load.
+    """
+    from src.enrichment import yolo_detect
+
+    started = time.perf_counter()
+    context.log.info("Starting AI Enrichment...")
     # Enrichment reads images (from scraper) and writes CSV/DB
-    subprocess.run(["python", "src/enrichment/yolo_detect.py"], check=True)
-    logger.info("AI Enrichment Complete.")
+    stats = yolo_detect.main(channels=partition_channels(context))
+    context.log.info("AI Enrichment Complete.")
+    return stage_output(stats, started, "AI enrichment")
 
 
 @op
-def transform_data(start_after_enrich):
-    """Run dbt transformations. Depends on enrichment (fact table source)."""
-    logger.info("Starting dbt transformations...")
-    # Assuming dbt is installed and available in path
-    project_dir = "dbt_project"
-    subprocess.run(["dbt", "build", "--project-dir", project_dir], check=True)
-    logger.info("dbt Transformations Complete.")
+def transform_data(context, start_after_load, start_after_enrich):
+    """
+    Run dbt transformations in-process. Depends on load and enrichment (both fact table sources).
+    Records the run afterwards, which invalidates the API response cache.
+    """
+    started = time.perf_counter()
+    stats = run_dbt_build(context.log)
+
+    run_id = record_pipeline_run(context.run_id)
+    context.log.info(f"Recorded pipeline run {run_id}; API caches will refresh.")
+    return stage_output(stats, started, "dbt build")
 
 
 @job
 def telehealth_daily_pipeline():
     """
-    Daily pipeline: Scrape -> Load -> Enrich (YOLO) -> Transform (dbt).
-    Note: 'Load' loads JSONs. 'Enrich' processes images and loads detections.
-    Ideally, Enrich and Load could be parallel after Scrape, but let's sequence for simplicity:
-    Scrape -> Load (JSON) -> Enrich (Images + DB Load) -> Transform (dbt, uses both sources).
+    Full pipeline: Scrape -> (Load JSON || Enrich YOLO) -> Transform (dbt), over every file.
+    Load and Enrich only need the scraped files, so they run in parallel;
+    Transform waits for both because it uses both sources.
     """
     scraped = scrape_telegram()
     loaded = load_data(scraped)
-    enriched = enrich_data(loaded)
-    transform_data(enriched)
+    enriched = enrich_data(scraped)
+    transform_data(loaded, enriched)
 
 
-# Schedule: Run every day at midnight
-daily_schedule = ScheduleDefinition(
-    job=telehealth_daily_pipeline,
-    cron_schedule="0 0 * * *",
-)
+@job(partitions_def=channel_partitions)
+def telehealth_channel_pipeline():
+    """
+    Per-channel Scrape -> Enrich. Launch several partitions (or a backfill) to process
+    channels in parallel; the daily pipeline then loads and transforms everything.
+    """
+    enrich_data(scrape_telegram())
+
 
+# The schedule materializes the daily-partitioned assets; the op jobs are for manual runs.
 defs = Definitions(
-    jobs=[telehealth_daily_pipeline],
-    schedules=[daily_schedule],
+    assets=[raw_telegram_messages, image_detections, dbt_marts],
+    jobs=[daily_assets_job, telehealth_daily_pipeline, telehealth_channel_pipeline],
+    schedules=[daily_assets_schedule],
 )
@@ -0,0 +1,42 @@
+import uuid
+from sqlalchemy import text
+
+RUNS_TABLE = "raw.pipeline_runs"
+
+# Latest completed run; the API tags cached responses with its run_id
+CURRENT_RUN_QUERY = f"""
+    SELECT run_id, completed_at
+    FROM {RUNS_TABLE}
+    ORDER BY completed_at DESC
+    LIMIT 1
+"""
+
+
+def ensure_runs_table(connection):
+    connection.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
+    connection.execute(
+        text(f"""
+            CREATE TABLE IF NOT EXISTS {RUNS_TABLE} (
+                run_id TEXT PRIMARY KEY,
+                completed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+    )
+
+
+def bump_pipeline_run(engine, run_id=None):
+    """
+    Records a completed pipeline run (after the dbt marts are rebuilt) and returns its run_id.
+    A new run_id invalidates every API response cached under the previous one.
+    """
+    run_id = run_id or uuid.uuid4().hex
+    with engine.begin() as connection:
+        ensure_runs_table(connection)
+        connection.execute(
+            text(f"""
+                INSERT INTO {RUNS_TABLE} (run_id, completed_at) VALUES (:run_id, now())
+                ON CONFLICT (run_id) DO UPDATE SET completed_at = EXCLUDED.completed_at
+            """),
+            {"run_id": run_id},
+        )
+    return run_id